@@ -1,32 +1,441 @@
 import sqlite3
+import atexit
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import re
 
+import migrations
+
 DB_PATH = Path('projects.db')
+DEFAULT_IMAGE = 'Image-Coming-Soon.png'
 
+# Applied to every new connection. WAL lets readers proceed while a writer
+# holds the lock; busy_timeout makes writers wait instead of failing.
+BUSY_TIMEOUT_MS = 5000
+PRAGMAS: Tuple[Tuple[str, object], ...] = (
+	('journal_mode', 'WAL'),
+	('synchronous', 'NORMAL'),
+	('busy_timeout', BUSY_TIMEOUT_MS),
+	('cache_size', -16000),  # negative = KiB, so ~16 MB of page cache
+	('mmap_size', 256 * 1024 * 1024),
+	('temp_store', 'MEMORY'),
+)
 
-def get_connection() -> sqlite3.Connection:
-	conn = sqlite3.connect(DB_PATH)
+
+# Called as observer(sql, seconds) after every statement run through a pooled
+# connection; see set_statement_observer(). None keeps statements untimed.
+_statement_observer = None
+
+
+def set_statement_observer(observer) -> None:
+	"""Install (or with None, remove) the callback that times every SQL statement."""
+	global _statement_observer
+	_statement_observer = observer
+
+
+class TimedCursor(sqlite3.Cursor):
+	"""Cursor that reports each statement's duration to the statement observer."""
+
+	def _timed(self, method, sql, *args):
+		observer = _statement_observer
+		if observer is None:
+			return method(sql, *args)
+		started = time.perf_counter()
+		try:
+			return method(sql, *args)
+		finally:
+			observer(sql, time.perf_counter() - started)
+
+	def execute(self, sql, parameters=()):
+		return self._timed(super().execute, sql, parameters)
+
+	def executemany(self, sql, seq_of_parameters):
+		return self._timed(super().executemany, sql, seq_of_parameters)
+
+	def executescript(self, sql_script):
+		return self._timed(super().executescript, sql_script)
+
+
+class PooledConnection(sqlite3.Connection):
+	"""sqlite3 connection that goes back to its pool when the outermost `with` exits."""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.pool: Optional['ConnectionPool'] = None
+		self.path = ''
+		self.epoch = 0
+		self.created_at = time.monotonic()
+		self.uses = 0
+		self.depth = 0
+
+	def cursor(self, factory=TimedCursor):
+		return super().cursor(factory)
+
+	# sqlite3.Connection's shortcuts don't go through cursor(), so route them explicitly
+	def execute(self, sql, parameters=()):
+		return self.cursor().execute(sql, parameters)
+
+	def executemany(self, sql, seq_of_parameters):
+		return self.cursor().executemany(sql, seq_of_parameters)
+
+	def executescript(self, sql_script):
+		return self.cursor().executescript(sql_script)
+
+	def __enter__(self):
+		self.depth += 1
+		return super().__enter__()
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		# Only the outermost block commits or rolls back; nested DAL calls
+		# leave the transaction to whoever opened it.
+		self.depth -= 1
+		if self.depth > 0:
+			return False
+		try:
+			return super().__exit__(exc_type, exc_value, traceback)
+		finally:
+			if self.pool is not None:
+				self.pool.release(self)
+
+
+def _open_connection(path: str) -> PooledConnection:
+	conn = sqlite3.connect(
+		path,
+		timeout=BUSY_TIMEOUT_MS / 1000,
+		factory=PooledConnection,
+		check_same_thread=False,  # pooled connections move between threads, one owner at a time
+	)
 	conn.row_factory = sqlite3.Row
+	for name, value in PRAGMAS:
+		conn.execute(f"PRAGMA {name} = {value}")
+	conn.path = path
 	return conn
 
 
-def init_db() -> None:
-	with get_connection() as conn:
-		cursor = conn.cursor()
-		cursor.execute(
-			"""
-			CREATE TABLE IF NOT EXISTS projects (
-				id INTEGER PRIMARY KEY AUTOINCREMENT,
-				slug TEXT UNIQUE NOT NULL,
-				title TEXT NOT NULL,
-				description TEXT NOT NULL,
-				image_file_name TEXT NOT NULL
-			);
-			"""
+class ConnectionPool:
+	"""Bounded pool of tuned SQLite connections.
+
+	A thread keeps the connection it checked out until its outermost `with`
+	block exits, so nested DAL calls share one connection and transaction.
+	Idle connections are recycled after `max_age` seconds or `max_uses`
+	checkouts, and whenever `DB_PATH` points somewhere else.
+	"""
+
+	def __init__(self, max_idle: int = 8, max_age: float = 300.0, max_uses: int = 10000):
+		self.max_idle = max_idle
+		self.max_age = max_age
+		self.max_uses = max_uses
+		self._idle: List[PooledConnection] = []
+		self._local = threading.local()
+		self._lock = threading.Lock()
+		self._epoch = 0
+		self._in_use = 0
+		self._stats = {'opened': 0, 'reused': 0, 'recycled': 0, 'discarded': 0}
+
+	def acquire(self, path: str) -> PooledConnection:
+		conn = getattr(self._local, 'conn', None)
+		if conn is not None:
+			if conn.path == path:
+				return conn
+			# DB_PATH changed while this thread held a connection
+			self._local.conn = None
+			if conn.depth == 0:
+				self.release(conn)
+		conn = self._checkout(path)
+		self._local.conn = conn
+		return conn
+
+	def current(self) -> Optional[PooledConnection]:
+		"""Connection this thread already holds, if any."""
+		return getattr(self._local, 'conn', None)
+
+	def _expired(self, conn: PooledConnection) -> bool:
+		return (
+			conn.epoch != self._epoch
+			or conn.uses >= self.max_uses
+			or time.monotonic() - conn.created_at >= self.max_age
 		)
-		conn.commit()
+
+	def _checkout(self, path: str) -> PooledConnection:
+		stale: List[PooledConnection] = []
+		found: Optional[PooledConnection] = None
+		with self._lock:
+			while self._idle:
+				candidate = self._idle.pop()
+				if candidate.path == path and not self._expired(candidate):
+					found = candidate
+					self._stats['reused'] += 1
+					break
+				stale.append(candidate)
+			self._stats['recycled'] += len(stale)
+			self._in_use += 1
+			epoch = self._epoch
+		for conn in stale:
+			conn.close()
+		if found is None:
+			try:
+				found = _open_connection(path)
+			except Exception:
+				with self._lock:
+					self._in_use -= 1
+				raise
+			found.pool = self
+			found.epoch = epoch
+			with self._lock:
+				self._stats['opened'] += 1
+		found.uses += 1
+		return found
+
+	def release(self, conn: PooledConnection) -> None:
+		if getattr(self._local, 'conn', None) is conn:
+			self._local.conn = None
+		if conn.in_transaction:
+			conn.rollback()
+		with self._lock:
+			self._in_use -= 1
+			if self._expired(conn) or conn.path != str(DB_PATH):
+				self._stats['recycled'] += 1
+			elif len(self._idle) >= self.max_idle:
+				self._stats['discarded'] += 1
+			else:
+				self._idle.append(conn)
+				return
+		conn.close()
+
+	def close_all(self) -> None:
+		"""Close idle connections; connections in use are closed when released."""
+		with self._lock:
+			self._epoch += 1
+			idle, self._idle = self._idle, []
+		for conn in idle:
+			conn.close()
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return dict(self._stats, in_use=self._in_use, idle=len(self._idle))
+
+
+_pool = ConnectionPool()
+atexit.register(_pool.close_all)
+
+
+def get_connection() -> sqlite3.Connection:
+	"""Return this thread's pooled connection; use it as `with get_connection() as conn:`."""
+	return _pool.acquire(str(DB_PATH))
+
+
+def get_pool_stats() -> Dict[str, int]:
+	return _pool.stats()
+
+
+def close_all_connections() -> None:
+	_pool.close_all()
+	_cache.reset()
+
+
+class Project:
+	"""One projects row: attribute access, no per-row dict.
+
+	The record itself is 96 bytes against 272 for dict(row) (CPython 3.11);
+	see benchmarks/bench_memory.py. Templates read fields as
+	`project.title`; `project['title']` also works for code written against
+	the dict API. Records handed out by the cache are shared between
+	callers, so treat them as read-only and use as_dict() for a copy.
+	"""
+
+	__slots__ = ('id', 'slug', 'title', 'description', 'image_file_name', 'image_width', 'image_height', 'image_color')
+
+	def __init__(self, id, slug, title, description, image_file_name,
+			image_width=None, image_height=None, image_color=None):
+		self.id = id
+		self.slug = slug
+		self.title = title
+		self.description = description
+		self.image_file_name = image_file_name
+		self.image_width = image_width
+		self.image_height = image_height
+		self.image_color = image_color
+
+	def __getitem__(self, key):
+		try:
+			return getattr(self, key)
+		except (AttributeError, TypeError):
+			raise KeyError(key) from None
+
+	def __eq__(self, other):
+		if not isinstance(other, Project):
+			return NotImplemented
+		return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+	__hash__ = None
+
+	def __repr__(self):
+		return f"Project(id={self.id!r}, slug={self.slug!r})"
+
+	def as_dict(self) -> Dict:
+		return {f: getattr(self, f) for f in self.__slots__}
+
+
+PROJECT_COLUMNS = ', '.join(Project.__slots__)
+
+
+def _project_factory(cursor: sqlite3.Cursor, row: tuple) -> Project:
+	# Row factory for SELECT {PROJECT_COLUMNS}: skips sqlite3.Row entirely
+	return Project(*row)
+
+
+def _select_projects(conn: sqlite3.Connection, where: str = '', params: tuple = ()) -> sqlite3.Cursor:
+	cursor = conn.cursor()
+	cursor.row_factory = _project_factory
+	cursor.execute(f"SELECT {PROJECT_COLUMNS} FROM projects {where}", params)
+	return cursor
+
+
+class ProjectCache:
+	"""Read-through cache of the projects table.
+
+	Freshness is checked with `PRAGMA data_version` on a private probe
+	connection: it changes whenever any other connection, in this process or
+	another one, commits. Only when it moves is the `data_generation` counter
+	(bumped by triggers on `projects`) read, so writes to unrelated tables do
+	not throw the cache away.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._probe: Optional[sqlite3.Connection] = None
+		self._path: Optional[str] = None
+		self._data_version: Optional[int] = None
+		self._generation: Optional[int] = None
+		self._projects: Optional[List[Project]] = None
+		self._by_slug: Dict[str, Project] = {}
+		self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+	def _read_generation(self) -> Optional[int]:
+		try:
+			row = self._probe.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()
+		except sqlite3.OperationalError:
+			return None  # database predates the generation table
+		return row[0] if row else None
+
+	def _clear(self) -> None:
+		self._projects = None
+		self._by_slug = {}
+
+	def _validate(self) -> None:
+		# Caller holds self._lock.
+		path = str(DB_PATH)
+		if self._probe is None or self._path != path:
+			self._close_probe()
+			self._probe = sqlite3.connect(path, check_same_thread=False)
+			self._path = path
+		data_version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+		if data_version == self._data_version:
+			return
+		generation = self._read_generation()
+		if generation is None or generation != self._generation:
+			if self._projects is not None or self._by_slug:
+				self._stats['invalidations'] += 1
+			self._clear()
+		self._data_version = data_version
+		self._generation = generation
+
+	def _close_probe(self) -> None:
+		if self._probe is not None:
+			self._probe.close()
+		self._probe = None
+		self._path = None
+		self._data_version = None
+		self._generation = None
+		self._clear()
+
+	def generation(self) -> int:
+		with self._lock:
+			self._validate()
+			return self._generation or 0
+
+	@staticmethod
+	def _bypass() -> bool:
+		# Reads inside an open write transaction may see uncommitted rows; never cache those.
+		conn = _pool.current()
+		return conn is not None and conn.in_transaction
+
+	def all_projects(self) -> List[Project]:
+		if self._bypass():
+			return _select_projects(_pool.current(), "ORDER BY id ASC").fetchall()
+		with self._lock:
+			self._validate()
+			if self._projects is None:
+				self._stats['misses'] += 1
+				with get_connection() as conn:
+					self._projects = _select_projects(conn, "ORDER BY id ASC").fetchall()
+				self._by_slug = {p.slug: p for p in self._projects}
+			else:
+				self._stats['hits'] += 1
+			return list(self._projects)
+
+	def project_by_slug(self, slug: str) -> Optional[Project]:
+		if self._bypass():
+			return _select_projects(_pool.current(), "WHERE slug = ?", (slug,)).fetchone()
+		with self._lock:
+			self._validate()
+			# Once the full list is loaded the index is complete, so absence is a hit too.
+			if slug in self._by_slug or self._projects is not None:
+				self._stats['hits'] += 1
+				return self._by_slug.get(slug)
+			self._stats['misses'] += 1
+			with get_connection() as conn:
+				project = _select_projects(conn, "WHERE slug = ?", (slug,)).fetchone()
+			# Misses aren't kept: slugs come from URLs, so caching them would let
+			# arbitrary requests grow the index without bound.
+			if project is not None:
+				self._by_slug[slug] = project
+			return project
+
+	def invalidate(self) -> None:
+		with self._lock:
+			self._stats['invalidations'] += 1
+			self._clear()
+			self._data_version = None
+			self._generation = None
+
+	def reset(self) -> None:
+		with self._lock:
+			self._close_probe()
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return dict(self._stats)
+
+
+_cache = ProjectCache()
+
+
+def get_cache_stats() -> Dict[str, int]:
+	return _cache.stats()
+
+
+def get_data_version() -> int:
+	"""Counter bumped on every change to the projects table, shared by all processes."""
+	return _cache.generation()
+
+
+def init_db() -> None:
+	"""Create or upgrade the schema (see migrations.py); a single SELECT when already current."""
+	migrations.migrate(DB_PATH)
+
+
+SEED_TAGS: Dict[str, List[str]] = {
+	'iu-mobile': ['ux research', 'data analysis', 'mobile'],
+	'building-a-mind': ['ui design', 'documentation', 'ai'],
+	'resource-library': ['ux research', 'information architecture', 'content migration'],
+}
 
 
 def seed_projects() -> None:
@@ -63,23 +472,163 @@ def seed_projects() -> None:
 			"INSERT INTO projects (slug, title, description, image_file_name) VALUES (?, ?, ?, ?)",
 			projects,
 		)
-		conn.commit()
+		for slug, tags in SEED_TAGS.items():
+			project_id = conn.execute("SELECT id FROM projects WHERE slug = ?", (slug,)).fetchone()[0]
+			_tag_project(conn, project_id, tags)
+	_cache.invalidate()
+
+
+def get_projects() -> List[Project]:
+	"""Every project as a shared, cached Project record, ordered by id."""
+	return _cache.all_projects()
+
+
+def get_project(slug: str) -> Optional[Project]:
+	return _cache.project_by_slug(slug)
+
+
+ITER_BATCH_SIZE = 500
+
+
+def iter_projects(after: Optional[int] = None, limit: Optional[int] = None,
+		batch_size: int = ITER_BATCH_SIZE) -> Iterator[Project]:
+	"""Yield projects with id > `after`, in id order, straight from the cursor, bypassing the cache.
+
+	Only `batch_size` rows are held at a time, so walking a large table
+	costs the same memory as walking a small one. `limit` of None means
+	every remaining row. The pooled connection is kept until the generator
+	is exhausted or closed.
+	"""
+	with get_connection() as conn:
+		cursor = _select_projects(
+			conn, "WHERE id > ? ORDER BY id ASC LIMIT ?",
+			(after if after is not None else -1, limit if limit is not None else -1),
+		)
+		while True:
+			batch = cursor.fetchmany(batch_size)
+			if not batch:
+				return
+			yield from batch
 
 
 def get_all_projects() -> List[Dict]:
+	return [p.as_dict() for p in get_projects()]
+
+
+def get_project_by_slug(slug: str) -> Optional[Dict]:
+	project = get_project(slug)
+	return project.as_dict() if project else None
+
+
+PAGE_SIZE = 50
+
+# Wrapped around matched terms in search results; the app turns them into <mark> after escaping.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+def _fts_query(text: str) -> str:
+	# Quote every term so user input can't use FTS5 query syntax; match terms as prefixes.
+	terms = re.findall(r"\w+", text)
+	return " ".join(f'"{term}"*' for term in terms)
+
+
+_fts_paths = set()  # databases known to have a usable projects_fts index
+
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+	"""Whether this database has the FTS5 index and this SQLite can query it."""
+	if conn.path in _fts_paths:
+		return True
+	found = conn.execute(
+		"SELECT sqlite_compileoption_used('ENABLE_FTS5') AND EXISTS "
+		"(SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts')"
+	).fetchone()[0]
+	if found:
+		_fts_paths.add(conn.path)
+	return bool(found)
+
+
+def search_projects(query: str, limit: int = PAGE_SIZE, offset: int = 0) -> List[Dict]:
+	"""Full-text search over titles and descriptions, best matches first.
+
+	Each result is the project row plus `rank` (bm25, lower is better),
+	`title_highlight` and `snippet`, with matches wrapped in
+	HIGHLIGHT_START/HIGHLIGHT_END.
+	"""
+	match = _fts_query(query)
+	if not match:
+		return []
 	with get_connection() as conn:
 		cursor = conn.cursor()
-		cursor.execute("SELECT * FROM projects ORDER BY id ASC")
-		rows = cursor.fetchall()
-		return [dict(row) for row in rows]
+		if _has_fts(conn):
+			cursor.execute(
+				"""
+				SELECT p.*,
+					bm25(projects_fts, 10.0, 1.0) AS rank,
+					highlight(projects_fts, 0, ?, ?) AS title_highlight,
+					snippet(projects_fts, 1, ?, ?, '…', 24) AS snippet
+				FROM projects_fts
+				JOIN projects p ON p.id = projects_fts.rowid
+				WHERE projects_fts MATCH ?
+				ORDER BY rank
+				LIMIT ? OFFSET ?
+				""",
+				(HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END, match, limit, offset),
+			)
+		else:
+			# No FTS5 index (SQLite built without it): unranked substring scan.
+			terms = re.findall(r"\w+", query)
+			where = " AND ".join("(title LIKE ? OR description LIKE ?)" for _ in terms)
+			params: List = []
+			for term in terms:
+				params += [f"%{term}%", f"%{term}%"]
+			cursor.execute(
+				f"SELECT *, 0.0 AS rank, title AS title_highlight, description AS snippet "
+				f"FROM projects WHERE {where} ORDER BY id LIMIT ? OFFSET ?",
+				params + [limit, offset],
+			)
+		return [dict(row) for row in cursor.fetchall()]
 
 
-def get_project_by_slug(slug: str) -> Optional[Dict]:
+def get_projects_page(after: Optional[int] = None, before: Optional[int] = None, limit: int = PAGE_SIZE) -> Dict:
+	"""Return one page of projects ordered by id, using keyset pagination.
+
+	Pass `after` (the last id of the previous page) to page forward or
+	`before` (the first id of the next page) to page back. The result holds
+	the page's `projects` plus `next_after`/`prev_before` cursors, which are
+	None when there is nothing further in that direction.
+	"""
+	limit = max(1, limit)
 	with get_connection() as conn:
 		cursor = conn.cursor()
-		cursor.execute("SELECT * FROM projects WHERE slug = ?", (slug,))
-		row = cursor.fetchone()
-		return dict(row) if row else None
+		if before is not None:
+			cursor.execute("SELECT * FROM projects WHERE id < ? ORDER BY id DESC LIMIT ?", (before, limit + 1))
+			rows = cursor.fetchall()
+			has_prev = len(rows) > limit
+			rows = rows[:limit][::-1]
+			has_next = True
+		else:
+			cursor.execute(
+				"SELECT * FROM projects WHERE id > ? ORDER BY id ASC LIMIT ?",
+				(after if after is not None else -1, limit + 1),
+			)
+			rows = cursor.fetchall()
+			has_next = len(rows) > limit
+			rows = rows[:limit]
+			has_prev = after is not None
+		if rows and has_prev and before is None:
+			cursor.execute("SELECT 1 FROM projects WHERE id < ? LIMIT 1", (rows[0]['id'],))
+			has_prev = cursor.fetchone() is not None
+		if rows and has_next and before is not None:
+			cursor.execute("SELECT 1 FROM projects WHERE id > ? LIMIT 1", (rows[-1]['id'],))
+			has_next = cursor.fetchone() is not None
+		projects = [dict(row) for row in rows]
+	return {
+		'projects': projects,
+		'next_after': projects[-1]['id'] if projects and has_next else None,
+		'prev_before': projects[0]['id'] if projects and has_prev else None,
+	}
 
 
 def _slugify(title: str) -> str:
@@ -88,29 +637,630 @@ def _slugify(title: str) -> str:
 	return s or "project"
 
 
+def _slug_suffix(base_slug: str, slug: str) -> int:
+	"""Suffix of slug relative to base_slug: 1 for the base itself, N for 'base-N', else 0."""
+	if slug == base_slug:
+		return 1
+	tail = slug[len(base_slug) + 1:] if slug.startswith(base_slug + "-") else ""
+	return int(tail) if tail.isdigit() else 0
+
+
+def _max_slug_suffix(conn: sqlite3.Connection, base_slug: str) -> int:
+	# Range scan on the slug index covering base_slug itself and every 'base_slug-...'
+	cur = conn.execute(
+		"SELECT slug FROM projects WHERE slug = ? OR (slug > ? AND slug < ?)",
+		(base_slug, base_slug + "-", base_slug + "."),
+	)
+	return max((_slug_suffix(base_slug, row[0]) for row in cur), default=0)
+
+
 def _unique_slug(conn: sqlite3.Connection, base_slug: str) -> str:
-	slug = base_slug
-	index = 1
+	"""Allocate the next free slug for base_slug: base, base-2, base-3, ...
+
+	slug_counters remembers the last suffix handed out per base, so the usual
+	cost is one upsert and one indexed probe no matter how many collisions
+	exist. The upsert takes the write lock, so concurrent writers get
+	distinct suffixes. If the probe finds the slug taken (rows older than the
+	counter, or a title that itself slugifies to 'base-N') the counter is
+	resynced from the highest suffix in use.
+	"""
 	cur = conn.cursor()
-	while True:
-		cur.execute("SELECT 1 FROM projects WHERE slug = ?", (slug,))
-		if cur.fetchone() is None:
-			return slug
-		index += 1
-		slug = f"{base_slug}-{index}"
+	cur.execute(
+		"INSERT INTO slug_counters (base, last_suffix) VALUES (?, 1) "
+		"ON CONFLICT(base) DO UPDATE SET last_suffix = last_suffix + 1",
+		(base_slug,),
+	)
+	cur.execute("SELECT last_suffix FROM slug_counters WHERE base = ?", (base_slug,))
+	suffix = cur.fetchone()[0]
+	slug = base_slug if suffix == 1 else f"{base_slug}-{suffix}"
+	cur.execute("SELECT 1 FROM projects WHERE slug = ?", (slug,))
+	if cur.fetchone() is None:
+		return slug
+	suffix = _max_slug_suffix(conn, base_slug) + 1
+	cur.execute("UPDATE slug_counters SET last_suffix = ? WHERE base = ?", (suffix, base_slug))
+	return f"{base_slug}-{suffix}"
+
 
+def _insert_row(conn: sqlite3.Connection, title: str, description: str, image_file_name: str,
+		tags: Iterable[str] = (), image_meta: Optional[Dict] = None) -> Dict:
+	slug = _unique_slug(conn, _slugify(title))
+	meta = image_meta or {}
+	row = {
+		'slug': slug,
+		'title': title,
+		'description': description,
+		'image_file_name': image_file_name,
+		'image_width': meta.get('width'),
+		'image_height': meta.get('height'),
+		'image_color': meta.get('color'),
+	}
+	cursor = conn.execute(
+		f"INSERT INTO projects ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+		tuple(row.values()),
+	)
+	_tag_project(conn, cursor.lastrowid, normalize_tags(tags))
+	return {'id': cursor.lastrowid, **row}
 
-def insert_project(title: str, description: str, image_file_name: str) -> Dict:
-	"""Insert a new project and return the created row as dict."""
+
+WRITER_MAX_BATCH = 256
+WRITER_MAX_LATENCY = 0.0  # seconds to wait for more inserts after the first; 0 takes what is queued
+
+
+_NewProject = Tuple[str, str, str, Tuple[str, ...], Optional[Dict]]  # title, description, image_file_name, tags, image_meta
+
+
+class ProjectWriter:
+	"""Dedicated thread that group-commits project inserts.
+
+	Callers queue an insert and get a Future. The thread takes whatever
+	queued up while it wrote the previous batch (optionally waiting up to
+	`max_latency` after the first item for more), at most `max_batch`
+	rows, and writes them in one BEGIN IMMEDIATE transaction:
+	slugs are allocated inside it and there is one commit per batch, so a
+	burst of submissions never fights over the write lock. If the batch
+	fails it is retried row by row, so one bad insert only fails its own
+	caller. The thread starts on the first submit.
+	"""
+
+	def __init__(self, max_batch: int = WRITER_MAX_BATCH, max_latency: float = WRITER_MAX_LATENCY):
+		self.max_batch = max_batch
+		self.max_latency = max_latency
+		self._queue: 'queue.Queue[Optional[Tuple[Future, _NewProject]]]' = queue.Queue()
+		self._lock = threading.Lock()
+		self._thread: Optional[threading.Thread] = None
+		self._stats = {'inserts': 0, 'batches': 0, 'largest_batch': 0, 'failed_batches': 0}
+
+	def submit(self, title: str, description: str, image_file_name: str, tags: Iterable[str] = (),
+			image_meta: Optional[Dict] = None) -> Future:
+		future: Future = Future()
+		self._queue.put((future, (title, description, image_file_name, tuple(normalize_tags(tags)), image_meta)))
+		with self._lock:
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._run, name='dal-writer', daemon=True)
+				self._thread.start()
+		return future
+
+	def stop(self, timeout: Optional[float] = None) -> None:
+		"""Write everything already queued, then end the thread."""
+		with self._lock:
+			thread, self._thread = self._thread, None
+		if thread is not None:
+			self._queue.put(None)
+			thread.join(timeout)
+
+	def _collect(self) -> Tuple[List[Tuple[Future, _NewProject]], bool]:
+		first = self._queue.get()
+		if first is None:
+			return [], True
+		batch = [first]
+		deadline = time.monotonic() + self.max_latency
+		while len(batch) < self.max_batch:
+			remaining = deadline - time.monotonic()
+			try:
+				item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+			except queue.Empty:
+				break
+			if item is None:
+				return batch, True
+			batch.append(item)
+		return batch, False
+
+	def _run(self) -> None:
+		while True:
+			batch, stopping = self._collect()
+			if batch:
+				self._write(batch)
+			if stopping:
+				return
+
+	@staticmethod
+	def _commit(rows: List[_NewProject]) -> List[Dict]:
+		with get_connection() as conn:
+			conn.execute("BEGIN IMMEDIATE")
+			created = [_insert_row(conn, *row) for row in rows]
+		_cache.invalidate()
+		return created
+
+	def _write(self, batch: List[Tuple[Future, _NewProject]]) -> None:
+		try:
+			created = self._commit([row for _, row in batch])
+		except Exception as e:
+			with self._lock:
+				self._stats['failed_batches'] += 1
+			if len(batch) == 1:
+				batch[0][0].set_exception(e)
+				return
+			for future, row in batch:
+				self._write([(future, row)])
+			return
+		with self._lock:
+			self._stats['inserts'] += len(created)
+			self._stats['batches'] += 1
+			self._stats['largest_batch'] = max(self._stats['largest_batch'], len(created))
+		for (future, _), row in zip(batch, created):
+			future.set_result(row)
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return dict(self._stats, queued=self._queue.qsize())
+
+
+_writer = ProjectWriter()
+atexit.register(_writer.stop, 5.0)  # registered after the pool's, so it runs first
+
+
+def configure_writer(max_batch: Optional[int] = None, max_latency: Optional[float] = None) -> None:
+	if max_batch is not None:
+		_writer.max_batch = max(1, max_batch)
+	if max_latency is not None:
+		_writer.max_latency = max(0.0, max_latency)
+
+
+def get_writer_stats() -> Dict[str, int]:
+	return _writer.stats()
+
+
+def submit_project(title: str, description: str, image_file_name: str, tags: Iterable[str] = (),
+		image_meta: Optional[Dict] = None) -> Future:
+	"""Queue an insert on the writer thread; the Future resolves with the created row as dict."""
+	return _writer.submit(title, description, image_file_name, tags, image_meta)
+
+
+def insert_project(title: str, description: str, image_file_name: str, tags: Iterable[str] = (),
+		image_meta: Optional[Dict] = None) -> Dict:
+	"""Insert a new project and return the created row as dict.
+
+	`tags` are attached to it and `image_meta` ({'width', 'height',
+	'color'}, see imagemeta.py) fills the image columns. The insert is
+	group-committed by the writer thread. A caller that already holds a
+	connection writes on it directly, inside its own transaction, since
+	the writer could not take the lock it holds; the row is committed when
+	the caller's outermost `with` exits.
+	"""
+	if _pool.current() is None:
+		return submit_project(title, description, image_file_name, tags, image_meta).result()
 	with get_connection() as conn:
-		cursor = conn.cursor()
-		base = _slugify(title)
-		slug = _unique_slug(conn, base)
-		cursor.execute(
-			"INSERT INTO projects (slug, title, description, image_file_name) VALUES (?, ?, ?, ?)",
-			(slug, title, description, image_file_name),
+		row = _insert_row(conn, title, description, image_file_name, tags, image_meta)
+	_cache.invalidate()
+	return row
+
+
+def save_image_variants(image_file_name: str, variants: List[Dict]) -> None:
+	"""Replace the recorded derivatives (file_name, width, height, mime_type) of one image."""
+	with get_connection() as conn:
+		conn.execute("DELETE FROM image_variants WHERE image_file_name = ?", (image_file_name,))
+		conn.executemany(
+			"INSERT INTO image_variants (image_file_name, file_name, width, height, mime_type) VALUES (?, ?, ?, ?, ?)",
+			[(image_file_name, v['file_name'], v['width'], v['height'], v['mime_type']) for v in variants],
 		)
-		conn.commit()
-		cursor.execute("SELECT * FROM projects WHERE slug = ?", (slug,))
-		row = cursor.fetchone()
-		return dict(row)
+
+
+def get_image_variants(image_file_names: Iterable[str]) -> Dict[str, List[Dict]]:
+	"""Map each image that has recorded derivatives to them, narrowest first."""
+	names = list(dict.fromkeys(image_file_names))
+	variants: Dict[str, List[Dict]] = {}
+	with get_connection() as conn:
+		# Stay under SQLite's bound-parameter limit on big pages
+		for start in range(0, len(names), 500):
+			chunk = names[start:start + 500]
+			placeholders = ", ".join("?" * len(chunk))
+			rows = conn.execute(
+				f"SELECT * FROM image_variants WHERE image_file_name IN ({placeholders}) ORDER BY width, file_name",
+				chunk,
+			)
+			for row in rows:
+				variants.setdefault(row['image_file_name'], []).append(dict(row))
+	return variants
+
+
+def get_image_meta(image_file_name: str) -> Optional[Dict]:
+	"""{'width', 'height', 'color'} already recorded for an image by any project using it."""
+	with get_connection() as conn:
+		row = conn.execute(
+			"SELECT image_width, image_height, image_color FROM projects "
+			"WHERE image_file_name = ? AND image_width IS NOT NULL LIMIT 1",
+			(image_file_name,),
+		).fetchone()
+	return {'width': row[0], 'height': row[1], 'color': row[2]} if row else None
+
+
+def save_image_meta(image_file_name: str, meta: Dict) -> int:
+	"""Record an image's metadata on every project using it; returns the rows updated."""
+	with get_connection() as conn:
+		cursor = conn.execute(
+			"UPDATE projects SET image_width = ?, image_height = ?, image_color = ? WHERE image_file_name = ?",
+			(meta.get('width'), meta.get('height'), meta.get('color'), image_file_name),
+		)
+		return cursor.rowcount
+
+
+def get_project_images(missing_meta: bool = False) -> List[str]:
+	"""Distinct image file names used by projects, optionally only those without metadata."""
+	where = "WHERE image_width IS NULL" if missing_meta else ""
+	with get_connection() as conn:
+		return [row[0] for row in conn.execute(
+			f"SELECT DISTINCT image_file_name FROM projects {where} ORDER BY image_file_name"
+		)]
+
+
+TAG_MAX_LENGTH = 50
+FACET_LIMIT = 30
+FACET_CACHE_SIZE = 256
+
+
+def normalize_tags(tags) -> List[str]:
+	"""Tag names trimmed, lowercased and de-duplicated; a string is split on commas."""
+	if isinstance(tags, str):
+		tags = tags.split(',')
+	names = (" ".join(str(tag).split()).lower()[:TAG_MAX_LENGTH] for tag in tags)
+	return list(dict.fromkeys(name for name in names if name))
+
+
+def _tag_project(conn: sqlite3.Connection, project_id: int, tags: List[str]) -> None:
+	# Facet counts (tags.project_count) follow through the project_tags triggers
+	if not tags:
+		return
+	conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(tag,) for tag in tags])
+	conn.executemany(
+		"INSERT OR IGNORE INTO project_tags (tag_id, project_id) SELECT id, ? FROM tags WHERE name = ?",
+		[(project_id, tag) for tag in tags],
+	)
+
+
+def add_project_tags(project_id: int, tags: Iterable[str]) -> None:
+	with get_connection() as conn:
+		_tag_project(conn, project_id, normalize_tags(tags))
+
+
+def get_project_tags(project_ids: Iterable[int]) -> Dict[int, List[str]]:
+	"""Map each project that has tags to their names, alphabetically."""
+	ids = list(dict.fromkeys(project_ids))
+	tags: Dict[int, List[str]] = {}
+	with get_connection() as conn:
+		for start in range(0, len(ids), 500):
+			chunk = ids[start:start + 500]
+			rows = conn.execute(
+				f"SELECT pt.project_id, t.name FROM project_tags pt JOIN tags t ON t.id = pt.tag_id "
+				f"WHERE pt.project_id IN ({', '.join('?' * len(chunk))}) ORDER BY t.name",
+				chunk,
+			)
+			for project_id, name in rows:
+				tags.setdefault(project_id, []).append(name)
+	return tags
+
+
+def _tag_ids(conn: sqlite3.Connection, tags: List[str], match: str) -> Optional[List[int]]:
+	"""Ids of the named tags, rarest first; None when nothing can match."""
+	if match not in ('all', 'any'):
+		raise ValueError(f"match must be 'all' or 'any', not {match!r}")
+	if not tags:
+		return None
+	rows = conn.execute(
+		f"SELECT id, project_count FROM tags WHERE name IN ({', '.join('?' * len(tags))}) ORDER BY project_count",
+		tags,
+	).fetchall()
+	if not rows or (match == 'all' and len(rows) < len(tags)):
+		return None
+	return [row[0] for row in rows]
+
+
+def _matching_projects(tag_ids: List[int], match: str, forward: bool = True,
+		bound: Optional[int] = None, limit: Optional[int] = None) -> Tuple[str, List]:
+	"""SQL and parameters selecting the ids of projects with all/any of tag_ids.
+
+	With a `bound`, only ids past it in the given direction, ordered that
+	way, at most `limit` of them. AND walks the rarest tag's slice of the
+	project_tags key and probes it for the other tags; OR merges each
+	tag's first `limit` ids. Either way the work follows the tags involved,
+	not the size of the projects table.
+	"""
+	cmp, order = ('>', 'ASC') if forward else ('<', 'DESC')
+	if match == 'all':
+		sql = "SELECT pt.project_id FROM project_tags pt WHERE pt.tag_id = ?"
+		params: List = [tag_ids[0]]
+		if bound is not None:
+			sql += f" AND pt.project_id {cmp} ?"
+			params.append(bound)
+		for tag_id in tag_ids[1:]:
+			sql += " AND EXISTS (SELECT 1 FROM project_tags o WHERE o.tag_id = ? AND o.project_id = pt.project_id)"
+			params.append(tag_id)
+		if bound is not None:
+			sql += f" ORDER BY pt.project_id {order} LIMIT ?"
+			params.append(limit)
+		return sql, params
+	if bound is None:
+		return f"SELECT DISTINCT project_id FROM project_tags WHERE tag_id IN ({', '.join('?' * len(tag_ids))})", tag_ids
+	part = (
+		f"SELECT project_id FROM (SELECT project_id FROM project_tags "
+		f"WHERE tag_id = ? AND project_id {cmp} ? ORDER BY project_id {order} LIMIT ?)"
+	)
+	sql = " UNION ".join([part] * len(tag_ids)) + f" ORDER BY project_id {order} LIMIT ?"
+	params = [value for tag_id in tag_ids for value in (tag_id, bound, limit)] + [limit]
+	return sql, params
+
+
+def get_projects_by_tags(tags: Iterable[str], match: str = 'all', after: Optional[int] = None,
+		before: Optional[int] = None, limit: int = PAGE_SIZE) -> Dict:
+	"""One keyset page of the projects tagged with all (match='all') or any ('any') of `tags`.
+
+	Same arguments and result shape as get_projects_page().
+	"""
+	tags = normalize_tags(tags)
+	limit = max(1, limit)
+	page: Dict = {'projects': [], 'next_after': None, 'prev_before': None}
+	with get_connection() as conn:
+		tag_ids = _tag_ids(conn, tags, match)
+		if tag_ids is None:
+			return page
+		forward = before is None
+		bound = (after if after is not None else -1) if forward else before
+		sql, params = _matching_projects(tag_ids, match, forward, bound, limit + 1)
+		ids = [row[0] for row in conn.execute(sql, params)]
+		more = len(ids) > limit
+		ids = sorted(ids[:limit])
+		if not ids:
+			return page
+		# Anything on the other side of this page?
+		sql, params = _matching_projects(tag_ids, match, not forward, ids[0] if forward else ids[-1], 1)
+		behind = conn.execute(sql, params).fetchone() is not None
+		projects = [
+			p.as_dict() for p in _select_projects(conn, f"WHERE id IN ({', '.join('?' * len(ids))}) ORDER BY id", ids)
+		]
+	has_next, has_prev = (more, behind) if forward else (behind, more)
+	return {
+		'projects': projects,
+		'next_after': projects[-1]['id'] if projects and has_next else None,
+		'prev_before': projects[0]['id'] if projects and has_prev else None,
+	}
+
+
+_facet_lock = threading.Lock()
+_facet_cache: 'OrderedDict[tuple, List[Dict]]' = OrderedDict()
+
+
+def get_tag_facets(tags: Iterable[str] = (), match: str = 'all', limit: int = FACET_LIMIT) -> List[Dict]:
+	"""The most used tags as [{'name', 'count'}], biggest count first.
+
+	Without a filter the counts are the precomputed tags.project_count, read
+	from the tags_by_count index. With one they count each tag among the
+	projects matching `tags`/`match`. Results are cached per data version,
+	so repeat requests don't touch the database until something changes.
+	"""
+	tags = normalize_tags(tags)
+	key = (str(DB_PATH), get_data_version(), tuple(sorted(tags)), match, limit)
+	with _facet_lock:
+		if key in _facet_cache:
+			_facet_cache.move_to_end(key)
+			return _facet_cache[key]
+	with get_connection() as conn:
+		if not tags:
+			rows = conn.execute(
+				"SELECT name, project_count FROM tags WHERE project_count > 0 "
+				"ORDER BY project_count DESC, name LIMIT ?",
+				(limit,),
+			).fetchall()
+		else:
+			tag_ids = _tag_ids(conn, tags, match)
+			rows = []
+			if tag_ids is not None:
+				sql, params = _matching_projects(tag_ids, match)
+				rows = conn.execute(
+					f"SELECT t.name, COUNT(*) AS n FROM ({sql}) m "
+					f"JOIN project_tags x ON x.project_id = m.project_id JOIN tags t ON t.id = x.tag_id "
+					f"GROUP BY t.id ORDER BY n DESC, t.name LIMIT ?",
+					params + [limit],
+				).fetchall()
+	facets = [{'name': name, 'count': count} for name, count in rows]
+	with _facet_lock:
+		_facet_cache[key] = facets
+		while len(_facet_cache) > FACET_CACHE_SIZE:
+			_facet_cache.popitem(last=False)
+	return facets
+
+
+BULK_BATCH_SIZE = 1000
+
+
+def bulk_insert_projects(records: Iterable[Dict], batch_size: int = BULK_BATCH_SIZE) -> Dict:
+	"""Insert many projects in one transaction and return import stats.
+
+	Records are dicts with `title`, `description` and optionally
+	`image_file_name` and `tags` (a list, or a comma-separated string);
+	they are consumed lazily and written in
+	`executemany` batches. Slugs are allocated in memory against the
+	existing slugs, which are loaded once under the write lock, and the
+	slug counters are brought up to date at the end. A record without a
+	title or description raises ValueError and nothing is imported.
+	"""
+	start = time.perf_counter()
+	inserted = 0
+	with get_connection() as conn:
+		conn.execute("BEGIN IMMEDIATE")
+		taken = {row[0] for row in conn.execute("SELECT slug FROM projects")}
+		next_suffix = {row[0]: row[1] + 1 for row in conn.execute("SELECT base, last_suffix FROM slug_counters")}
+		used_suffix: Dict[str, int] = {}
+
+		batch: List[Tuple[str, str, str, str]] = []
+		tagged: List[Tuple[str, List[str]]] = []
+
+		def flush() -> int:
+			conn.executemany(
+				"INSERT INTO projects (slug, title, description, image_file_name) VALUES (?, ?, ?, ?)", batch
+			)
+			if tagged:
+				conn.executemany(
+					"INSERT OR IGNORE INTO tags (name) VALUES (?)",
+					[(tag,) for tag in dict.fromkeys(tag for _, tags in tagged for tag in tags)],
+				)
+				conn.executemany(
+					"INSERT OR IGNORE INTO project_tags (tag_id, project_id) "
+					"SELECT t.id, p.id FROM tags t, projects p WHERE t.name = ? AND p.slug = ?",
+					[(tag, slug) for slug, tags in tagged for tag in tags],
+				)
+			count = len(batch)
+			batch.clear()
+			tagged.clear()
+			return count
+
+		for number, record in enumerate(records, start=1):
+			if not isinstance(record, dict):
+				raise ValueError(f"record {number}: expected a dict, got {type(record).__name__}")
+			title = (record.get('title') or '').strip()
+			description = (record.get('description') or '').strip()
+			if not title or not description:
+				raise ValueError(f"record {number}: title and description are required")
+			base = _slugify(title)
+			suffix = next_suffix.get(base, 1)
+			slug = base if suffix == 1 else f"{base}-{suffix}"
+			while slug in taken:
+				suffix += 1
+				slug = f"{base}-{suffix}"
+			taken.add(slug)
+			next_suffix[base] = suffix + 1
+			used_suffix[base] = suffix
+			batch.append((slug, title, description, record.get('image_file_name') or DEFAULT_IMAGE))
+			tags = normalize_tags(record.get('tags') or ())
+			if tags:
+				tagged.append((slug, tags))
+			if len(batch) >= batch_size:
+				inserted += flush()
+		if batch:
+			inserted += flush()
+		conn.executemany(
+			"INSERT INTO slug_counters (base, last_suffix) VALUES (?, ?) "
+			"ON CONFLICT(base) DO UPDATE SET last_suffix = max(last_suffix, excluded.last_suffix)",
+			used_suffix.items(),
+		)
+	_cache.invalidate()
+	seconds = time.perf_counter() - start
+	return {
+		'inserted': inserted,
+		'seconds': seconds,
+		'rows_per_sec': inserted / seconds if seconds else 0.0,
+	}
+
+
+def create_job(kind: str, payload: Dict, max_attempts: int) -> int:
+	"""Persist a queued job and return its id."""
+	with get_connection() as conn:
+		cursor = conn.execute(
+			"INSERT INTO jobs (kind, payload, max_attempts, created_at) VALUES (?, ?, ?, ?)",
+			(kind, json.dumps(payload), max_attempts, time.time()),
+		)
+		return cursor.lastrowid
+
+
+def _job_from_row(row: sqlite3.Row) -> Dict:
+	job = dict(row)
+	job['payload'] = json.loads(job['payload'])
+	return job
+
+
+def get_job(job_id: int) -> Optional[Dict]:
+	with get_connection() as conn:
+		row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+		return _job_from_row(row) if row else None
+
+
+def claim_job(job_id: int) -> Optional[Dict]:
+	"""Mark a queued job running and return it, or None if someone else took it or its retry isn't due."""
+	now = time.time()
+	with get_connection() as conn:
+		cursor = conn.execute(
+			"UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ? "
+			"WHERE id = ? AND status = 'queued' AND run_after <= ?",
+			(now, job_id, now),
+		)
+		if cursor.rowcount != 1:
+			return None
+		row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+		return _job_from_row(row)
+
+
+def complete_job(job_id: int) -> None:
+	with get_connection() as conn:
+		conn.execute(
+			"UPDATE jobs SET status = 'done', last_error = NULL, finished_at = ? WHERE id = ?",
+			(time.time(), job_id),
+		)
+
+
+def fail_job(job_id: int, error: str, retry: bool, delay: float = 0.0) -> None:
+	"""Record a failed attempt.
+
+	A job that will be retried goes back to 'queued' with run_after set
+	`delay` seconds ahead; neither claim_job() nor get_queued_job_ids()
+	hands it out before then.
+	"""
+	now = time.time()
+	with get_connection() as conn:
+		if retry:
+			conn.execute(
+				"UPDATE jobs SET status = 'queued', last_error = ?, finished_at = NULL, run_after = ? WHERE id = ?",
+				(error, now + delay, job_id),
+			)
+		else:
+			conn.execute(
+				"UPDATE jobs SET status = 'failed', last_error = ?, finished_at = ? WHERE id = ?",
+				(error, now, job_id),
+			)
+
+
+def get_queued_job_ids(limit: int) -> List[int]:
+	"""Ids of queued jobs that are due to run, oldest first."""
+	with get_connection() as conn:
+		rows = conn.execute(
+			"SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY id LIMIT ?",
+			(time.time(), limit),
+		)
+		return [row[0] for row in rows]
+
+
+def requeue_stale_jobs(older_than: float) -> int:
+	"""Put jobs that have been 'running' for more than older_than seconds back in the queue.
+
+	Those were interrupted by a restart; jobs running in another live
+	worker process are left alone as long as they finish within the window.
+	"""
+	with get_connection() as conn:
+		cursor = conn.execute(
+			"UPDATE jobs SET status = 'queued' WHERE status = 'running' AND started_at < ?",
+			(time.time() - older_than,),
+		)
+		return cursor.rowcount
+
+
+def prune_done_jobs(older_than: float) -> int:
+	"""Delete 'done' jobs that finished more than older_than seconds ago; failed jobs are kept."""
+	with get_connection() as conn:
+		cursor = conn.execute(
+			"DELETE FROM jobs WHERE status = 'done' AND finished_at < ?",
+			(time.time() - older_than,),
+		)
+		return cursor.rowcount
+
+
+def count_jobs_by_status() -> Dict[str, int]:
+	with get_connection() as conn:
+		rows = conn.execute("SELECT status, COUNT(1) FROM jobs GROUP BY status")
+		return {row[0]: row[1] for row in rows}
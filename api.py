@@ -0,0 +1,151 @@
+"""
+Read-only JSON API for projects.
+
+    GET /api/projects                    every project, streamed
+    GET /api/projects?after=<id>&limit=<n>&fields=slug,title
+    GET /api/projects/<slug>
+
+/api/projects writes rows out as DAL.iter_projects() reads them from the
+cursor, so memory use doesn't grow with the table. The default body is a
+single JSON document, {"projects": [...], "next_after": <id or null>},
+sent in chunks; ?format=ndjson (or `Accept: application/x-ndjson`) sends
+one object per line instead. next_after is the `after` of the next page
+when a limit cut the listing short; NDJSON clients page with the last id
+they received.
+
+Responses carry a strong ETag derived from DAL.get_data_version() and the
+request's parameters. A matching If-None-Match is answered with 304
+before any row is read. The version is read before streaming starts, so
+a write racing a response at worst makes the next poll fetch again.
+"""
+
+import hashlib
+import json
+
+from flask import jsonify, request
+
+import DAL
+from page_cache import no_page_cache
+
+FIELDS = DAL.Project.__slots__
+NDJSON = 'application/x-ndjson'
+CHUNK_ROWS = 100
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def _fields():
+    """?fields= as a tuple in Project field order; ValueError on unknown names."""
+    value = request.args.get('fields')
+    if not value:
+        return FIELDS
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names.difference(FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(f for f in FIELDS if f in names)
+
+
+def _wants_ndjson():
+    fmt = request.args.get('format')
+    if fmt is not None:
+        if fmt not in ('json', 'ndjson'):
+            raise ValueError("format must be 'json' or 'ndjson'")
+        return fmt == 'ndjson'
+    return request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+
+def _etag(*parts):
+    key = '\0'.join(map(str, (DAL.DB_PATH, DAL.get_data_version()) + parts))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _apply_validators(response, etag):
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    response.vary.add('Accept')
+    return response
+
+
+def _not_modified(app, etag):
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return _apply_validators(app.response_class(status=304), etag)
+
+
+def _error(status, message):
+    response = jsonify(error=message)
+    response.status_code = status
+    return response
+
+
+def _generate(after, limit, fields, ndjson):
+    """Body chunks of up to CHUNK_ROWS encoded projects each."""
+    projects = DAL.iter_projects(after=after, limit=None if limit is None else limit + 1)
+    chunk, count, last_id, more = [], 0, None, False
+    if not ndjson:
+        yield '{"projects":['
+    try:
+        for project in projects:
+            if count == limit:
+                more = True  # the extra row fetched only to see if another page follows
+                break
+            chunk.append(_encode({f: getattr(project, f) for f in fields}))
+            count += 1
+            last_id = project.id
+            if len(chunk) == CHUNK_ROWS:
+                yield _join(chunk, ndjson, first=count == len(chunk))
+                chunk = []
+        if chunk:
+            yield _join(chunk, ndjson, first=count == len(chunk))
+    finally:
+        projects.close()  # hands the connection back even if the client went away
+    if not ndjson:
+        yield f'],"next_after":{_encode(last_id if more else None)}}}'
+
+
+def _join(chunk, ndjson, first):
+    if ndjson:
+        return '\n'.join(chunk) + '\n'
+    return ','.join(chunk) if first else ',' + ','.join(chunk)
+
+
+def init_app(app):
+    @no_page_cache
+    def api_projects():
+        after = request.args.get('after', type=int)
+        limit = request.args.get('limit', type=int)
+        try:
+            fields = _fields()
+            ndjson = _wants_ndjson()
+        except ValueError as e:
+            return _error(400, str(e))
+        if limit is not None and limit < 1:
+            return _error(400, 'limit must be a positive integer')
+        etag = _etag('projects', after, limit, ','.join(fields), ndjson)
+        not_modified = _not_modified(app, etag)
+        if not_modified is not None:
+            return not_modified
+        response = app.response_class(
+            _generate(after, limit, fields, ndjson),
+            mimetype=NDJSON if ndjson else 'application/json',
+        )
+        return _apply_validators(response, etag)
+
+    @no_page_cache
+    def api_project(slug):
+        try:
+            fields = _fields()
+        except ValueError as e:
+            return _error(400, str(e))
+        etag = _etag('project', slug, ','.join(fields))
+        not_modified = _not_modified(app, etag)
+        if not_modified is not None:
+            return not_modified
+        project = DAL.get_project(slug)
+        if project is None:
+            return _error(404, 'project not found')
+        return _apply_validators(jsonify({f: getattr(project, f) for f in fields}), etag)
+
+    app.add_url_rule('/api/projects', 'api_projects', api_projects)
+    app.add_url_rule('/api/projects/<slug>', 'api_project', api_project)
@@ -1,51 +1,203 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, abort, current_app, stream_template
+from markupsafe import Markup, escape
 from werkzeug.utils import secure_filename
 from pathlib import Path
-from DAL import init_db, seed_projects, get_project_by_slug, get_all_projects, insert_project
-
-app = Flask(__name__)
-app.secret_key = 'dev-secret-key'
+import threading
+import api
+import assets
+import compression
+import freeze
+import imagemeta
+import images
+import jobs
+import metrics
+import migrations
+import page_cache
+import profiler
+import storage
+import templating
+import DAL
+from page_cache import no_page_cache
+from DAL import (
+    seed_projects, get_project, get_projects, iter_projects, get_projects_page, insert_project, search_projects,
+    get_image_variants, get_projects_by_tags, get_project_tags, get_tag_facets, normalize_tags,
+    DEFAULT_IMAGE, PAGE_SIZE, HIGHLIGHT_START, HIGHLIGHT_END,
+)
 
 UPLOAD_FOLDER = Path('static/images')
 ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
-DEFAULT_IMAGE = 'Image-Coming-Soon.png'
 
-# Ensure database and seed data are available when the app starts (dev convenience)
-init_db()
-seed_projects()
+# Registered on each app by create_app()
+ROUTES = []
+TEMPLATE_FILTERS = {}
+TEMPLATE_GLOBALS = {}
+
+# Projects with a bespoke page: slug -> (alias endpoint, template). Every
+# project is also served at /projects/<slug>; slugs not listed here get
+# the generic project_detail.html.
+PROJECT_PAGES = {
+    'iu-mobile': ('iu_mobile', 'iu_mobile.html'),
+    'building-a-mind': ('building_a_mind', 'building_a_mind.html'),
+    'resource-library': ('resource_library', 'resource_library.html'),
+}
+GENERIC_PROJECT_TEMPLATE = 'project_detail.html'
+
+def route(rule, **options):
+    """Like app.route, for the app(s) create_app() builds."""
+    def decorator(view):
+        ROUTES.append((rule, view, options))
+        return view
+    return decorator
+
+def template_filter(name):
+    def decorator(fn):
+        TEMPLATE_FILTERS[name] = fn
+        return fn
+    return decorator
+
+def template_global(fn):
+    TEMPLATE_GLOBALS[fn.__name__] = fn
+    return fn
+
+def create_app(config=None):
+    """Build the Flask app; `config` (a mapping) overrides the defaults before extensions read them.
+
+    Nothing touches the database here. The first request for each DB_PATH
+    checks the schema version and migrates if needed (once per deployment;
+    see migrations.py), seeding the sample projects when it just created
+    the schema.
+    """
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='dev-secret-key',
+        PROJECTS_PAGE_SIZE=PAGE_SIZE,
+        SEED_PROJECTS=True,
+        FREEZING=False,
+        DB_WRITER_MAX_BATCH=DAL.WRITER_MAX_BATCH,
+        DB_WRITER_MAX_LATENCY=DAL.WRITER_MAX_LATENCY,
+    )
+    app.config.update(config or {})
+    DAL.configure_writer(app.config['DB_WRITER_MAX_BATCH'], app.config['DB_WRITER_MAX_LATENCY'])
+    _check_schema_on_first_request(app)
+    assets.init_app(app)
+    compression.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
+    page_cache.init_app(app)
+    jobs.init_app(app)
+    api.init_app(app)
+    for name, fn in TEMPLATE_FILTERS.items():
+        app.add_template_filter(fn, name)
+    for name, fn in TEMPLATE_GLOBALS.items():
+        app.add_template_global(fn, name)
+    for rule, view, options in ROUTES:
+        app.add_url_rule(rule, view.__name__, view, **options)
+    templating.init_app(app)  # last: preloading needs the filters registered
+    return app
+
+def _check_schema_on_first_request(app):
+    checked = set()
+    lock = threading.Lock()
+
+    @app.before_request
+    def check_schema():
+        path = str(DAL.DB_PATH)
+        if path in checked:
+            return
+        with lock:
+            if path not in checked:
+                applied = migrations.migrate(path)
+                if applied and app.config['SEED_PROJECTS']:
+                    seed_projects()
+                if applied:
+                    jobs.enqueue('backfill_image_meta', {'images_dir': str(UPLOAD_FOLDER)})
+                checked.add(path)
+
+@template_filter('highlight')
+def highlight(text):
+    """Escape a search snippet and turn the DAL's match markers into <mark> tags."""
+    marked = str(escape(text or '')).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return Markup(marked)
 
-@app.route('/')
+@template_filter('srcset')
+def srcset(variants, mime_type=None):
+    """Build a srcset attribute value from image variants, optionally limited to one MIME type."""
+    return ', '.join(
+        f"{url_for('static', filename='images/' + v['file_name'])} {v['width']}w"
+        for v in variants
+        if mime_type is None or v['mime_type'] == mime_type
+    )
+
+@template_global
+def project_url(slug):
+    """Link to a project: its bespoke page's own URL if it has one, else /projects/<slug>."""
+    page = PROJECT_PAGES.get(slug)
+    return url_for(page[0]) if page else url_for('project_detail', slug=slug)
+
+def render_project(slug):
+    """Render a project with its bespoke template, or the generic one; 404 for unknown slugs."""
+    project = get_project(slug)
+    if project is None:
+        abort(404)
+    page = PROJECT_PAGES.get(slug)
+    if page:
+        return render_template(page[1], project=project)
+    variants = get_image_variants([project.image_file_name]).get(project.image_file_name)
+    return render_template(GENERIC_PROJECT_TEMPLATE, project=project, variants=variants)
+
+@freeze.url_generator('project_detail')
+def project_detail_urls():
+    """Projects without a bespoke page; those are frozen at their alias URL."""
+    return ({'slug': p.slug} for p in iter_projects() if p.slug not in PROJECT_PAGES)
+
+@jobs.handler('create_project')
+def create_project(payload):
+    """Job: generate derivatives for a new upload, then insert the project."""
+    if payload['process_image']:
+        images.process_image(payload['image_file_name'], images_dir=payload['images_dir'])
+    image_meta = payload.get('image_meta') or {}
+    if image_meta.get('width') and not image_meta.get('color'):
+        image_meta['color'] = imagemeta.placeholder_color(Path(payload['images_dir']) / payload['image_file_name'])
+    insert_project(
+        title=payload['title'],
+        description=payload['description'],
+        image_file_name=payload['image_file_name'],
+        tags=payload.get('tags', []),
+        image_meta=image_meta,
+    )
+
+@jobs.handler('backfill_image_meta')
+def backfill_image_meta(payload):
+    """Job: record sizes and placeholder colours for project images that have none yet."""
+    imagemeta.backfill(payload['images_dir'])
+
+@route('/')
 def index():
     """Home page"""
     return render_template('index.html')
 
-@app.route('/about')
+@route('/about')
 def about():
     """About page"""
     return render_template('about.html')
 
-@app.route('/contact', methods=['GET', 'POST'])
+@route('/contact', methods=['GET', 'POST'])
+@no_page_cache
 def contact():
     """Project submission form (was contact)."""
     if request.method == 'POST':
         title = request.form.get('title', '').strip()
         description = request.form.get('description', '').strip()
+        tags = normalize_tags(request.form.get('tags', ''))
 
-        image_file_name = DEFAULT_IMAGE
+        image_file_name, created = DEFAULT_IMAGE, False
         file = request.files.get('image')
         if file and file.filename:
             filename = secure_filename(file.filename)
             ext = Path(filename).suffix.lower()
             if ext in ALLOWED_EXTENSIONS:
-                save_path = UPLOAD_FOLDER / filename
-                # Avoid overwrite by adding suffix if exists
-                counter = 1
-                base = save_path.stem
-                while save_path.exists():
-                    save_path = UPLOAD_FOLDER / f"{base}-{counter}{ext}"
-                    counter += 1
-                file.save(save_path)
-                image_file_name = save_path.name
+                # Stored under its content hash, so re-uploads of the same image are deduplicated
+                image_file_name, created = storage.store_upload(file.stream, ext, images_dir=UPLOAD_FOLDER)
             else:
                 flash('Unsupported image type. Allowed: png, jpg, jpeg, gif, webp')
 
@@ -53,44 +205,92 @@ def contact():
             flash('Title and Description are required')
             return render_template('contact.html')
 
-        insert_project(title=title, description=description, image_file_name=image_file_name)
+        # Header-only size probe now; the placeholder colour is sampled on the job worker
+        image_meta = DAL.get_image_meta(image_file_name) or imagemeta.describe(
+            image_file_name, images_dir=UPLOAD_FOLDER, color=False
+        )
+
+        # Derivatives and the insert happen on a job worker; the project shows up shortly after
+        jobs.enqueue('create_project', {
+            'title': title,
+            'description': description,
+            'tags': tags,
+            'image_file_name': image_file_name,
+            'image_meta': image_meta,
+            'process_image': created,
+            'images_dir': str(UPLOAD_FOLDER),
+        })
         return redirect(url_for('projects'))
 
     return render_template('contact.html')
 
-@app.route('/resume')
+@route('/resume')
 def resume():
     """Resume page"""
     return render_template('resume.html')
 
-@app.route('/iu-mobile')
+@route('/iu-mobile')
 def iu_mobile():
-    """IU Mobile project page"""
-    project = get_project_by_slug('iu-mobile')
-    return render_template('iu_mobile.html', project=project)
+    """IU Mobile project page (alias of /projects/iu-mobile)"""
+    return render_project('iu-mobile')
 
-@app.route('/building-a-mind')
+@route('/building-a-mind')
 def building_a_mind():
-    """Building A Mind project page"""
-    project = get_project_by_slug('building-a-mind')
-    return render_template('building_a_mind.html', project=project)
+    """Building A Mind project page (alias of /projects/building-a-mind)"""
+    return render_project('building-a-mind')
 
-@app.route('/resource-library')
+@route('/resource-library')
 def resource_library():
-    """Resource Library project page"""
-    project = get_project_by_slug('resource-library')
-    return render_template('resource_library.html', project=project)
+    """Resource Library project page (alias of /projects/resource-library)"""
+    return render_project('resource-library')
 
-@app.route('/thank-you')
+@route('/projects/<slug>')
+def project_detail(slug):
+    """Any project by slug"""
+    return render_project(slug)
+
+@route('/thank-you')
 def thank_you():
     """Thank you page after form submission"""
     return render_template('thank_you.html')
 
-@app.route('/projects')
+@route('/projects')
+@no_page_cache
 def projects():
-    """Projects listing page"""
-    projects = get_all_projects()
-    return render_template('projects.html', projects=projects)
+    """Projects listing page, one keyset page at a time (?after=<id> / ?before=<id>), search results (?q=),
+    or the projects carrying ?tag=... (all of them, or any with ?match=any), with tag facet counts.
+    The frozen export gets every project on one page, since a static server can't follow ?after= links."""
+    limit = current_app.config['PROJECTS_PAGE_SIZE']
+    query = request.args.get('q', '').strip()
+    tags = normalize_tags(request.args.getlist('tag'))
+    match = 'any' if request.args.get('match') == 'any' else 'all'
+    if current_app.config['FREEZING']:
+        page = {'projects': get_projects(), 'next_after': None, 'prev_before': None}
+    elif query:
+        offset = max(0, request.args.get('offset', 0, type=int))
+        results = search_projects(query, limit=limit + 1, offset=offset)
+        page = {
+            'projects': results[:limit],
+            'next_offset': offset + limit if len(results) > limit else None,
+            'prev_offset': max(0, offset - limit) if offset else None,
+        }
+    else:
+        cursors = {
+            'after': request.args.get('after', type=int),
+            'before': request.args.get('before', type=int),
+            'limit': limit,
+        }
+        page = get_projects_by_tags(tags, match, **cursors) if tags else get_projects_page(**cursors)
+    variants = get_image_variants(p['image_file_name'] for p in page['projects'])
+    project_tags = get_project_tags(p['id'] for p in page['projects'])
+    # Keeps the tag filter on paging links; url_for drops the None
+    filters = {'tag': tags, 'match': match if tags and match == 'any' else None}
+    return stream_template(
+        'projects.html', projects=page['projects'], page=page, query=query, variants=variants,
+        tags=tags, match=match, filters=filters, facets=get_tag_facets(tags, match), project_tags=project_tags,
+    )
+
+app = create_app()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Fingerprinted static assets.
+
+`python assets.py build` hashes every file under static/ and writes
+static/manifest.json mapping e.g. css/styles.css -> css/styles.<hash>.css.
+Once `init_app(app)` is called, url_for('static', ...) rewrites to the
+fingerprinted name and the static route serves those URLs with a one-year
+immutable Cache-Control. Every other static file gets a strong,
+content-derived ETag and `no-cache`, so browsers revalidate and get a 304
+when nothing changed.
+
+The build also writes precompressed .gz (and, when the brotli package is
+installed, .br) siblings for text-like files. The static route picks one
+according to Accept-Encoding, so nothing is compressed per request.
+
+Without a manifest file the mapping is computed at startup. Fingerprinting
+is skipped in debug mode, where files change without a rebuild.
+
+Files are served with byte-range support (Range / If-Range, 206), so PDF
+viewers can load the resume piecemeal; bodies go out through the server's
+wsgi.file_wrapper, which gunicorn and others turn into os.sendfile. With
+STATIC_OFFLOAD set to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache,
+lighttpd) the app only answers headers and 304s and hands the file itself,
+ranges included, to the front proxy.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import threading
+from pathlib import Path
+
+from flask import current_app, request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.http import parse_range_header
+from werkzeug.security import safe_join
+
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+IMMUTABLE_MAX_AGE = 31536000
+# Generated at runtime, so not in the manifest; uploads are content-addressed already.
+DYNAMIC_DIRS = ('images/derived/',)
+IMMUTABLE_DIRS = ('images/uploads/',)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.html', '.svg', '.json', '.txt', '.xml', '.pdf'}
+# (Content-Encoding, file suffix), in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+ENCODED_SUFFIXES = tuple(suffix for _, suffix in ENCODINGS)
+# Only keep a compressed copy if it saves at least this fraction
+MIN_SAVING = 0.1
+# STATIC_OFFLOAD mode -> response header naming the file for the front proxy
+OFFLOAD_HEADERS = {'x-sendfile': 'X-Sendfile', 'x-accel-redirect': 'X-Accel-Redirect'}
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprinted_name(filename, digest):
+    stem, dot, extension = filename.rpartition('.')
+    if not dot or '/' in extension:
+        return f"{filename}.{digest[:HASH_LENGTH]}"
+    return f"{stem}.{digest[:HASH_LENGTH]}.{extension}"
+
+
+def _static_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            if name.startswith('.') or name == MANIFEST_NAME or name.endswith(ENCODED_SUFFIXES):
+                continue
+            path = Path(root) / name
+            filename = path.relative_to(static_folder).as_posix()
+            if filename.startswith(DYNAMIC_DIRS + IMMUTABLE_DIRS):
+                continue
+            yield filename, path
+
+
+def build_manifest(static_folder):
+    """Map each static file (relative, POSIX-style) to its fingerprinted name."""
+    return {
+        filename: fingerprinted_name(filename, file_digest(path))
+        for filename, path in sorted(_static_files(static_folder))
+    }
+
+
+def write_manifest(static_folder):
+    manifest = build_manifest(static_folder)
+    path = Path(static_folder) / MANIFEST_NAME
+    path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+    return manifest
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+def compress_static(static_folder):
+    """Write .gz/.br siblings for compressible static files; returns how many were written.
+
+    Stale siblings of files that no longer compress well are removed.
+    """
+    written = 0
+    for filename, path in _static_files(static_folder):
+        if path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            continue
+        data = path.read_bytes()
+        for suffix, compress in _compressors():
+            target = path.with_name(path.name + suffix)
+            compressed = compress(data)
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                target.write_bytes(compressed)
+                written += 1
+            elif target.exists():
+                target.unlink()
+    return written
+
+
+class AssetManifest:
+    """Fingerprint lookups in both directions plus a cache of content ETags."""
+
+    def __init__(self, manifest):
+        self.fingerprinted = dict(manifest)
+        self.sources = {v: k for k, v in manifest.items()}
+        self._etags = {}
+        self._lock = threading.Lock()
+
+    def etag(self, path):
+        """Strong ETag from the file's content, recomputed only when mtime or size change."""
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._etags.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        etag = file_digest(path)[:32]
+        with self._lock:
+            self._etags[path] = (key, etag)
+        return etag
+
+
+def load_manifest(static_folder):
+    path = Path(static_folder) / MANIFEST_NAME
+    if path.exists():
+        return json.loads(path.read_text())
+    return build_manifest(static_folder)
+
+
+def _rewrite_static_url(endpoint, values):
+    if endpoint != 'static' or current_app.debug or not current_app.config['ASSET_FINGERPRINTING']:
+        return
+    filename = values.get('filename')
+    fingerprinted = current_app.extensions['assets'].fingerprinted.get(filename)
+    if fingerprinted:
+        values['filename'] = fingerprinted
+
+
+def serve_static(filename):
+    """Static route: immutable caching for fingerprinted and content-addressed URLs, ETags for the rest."""
+    app = current_app
+    manifest = app.extensions['assets']
+    source = manifest.sources.get(filename, filename)
+    path = safe_join(app.static_folder, source)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    immutable = source != filename or filename.startswith(IMMUTABLE_DIRS)
+    etag = manifest.etag(path)
+    max_age = IMMUTABLE_MAX_AGE if immutable else None
+    if app.config['STATIC_OFFLOAD']:
+        # Precompressed siblings are left to the proxy too (nginx: gzip_static / brotli_static)
+        response = _offload(app, source, etag, _mimetype(source), max_age)
+        if immutable:
+            response.cache_control.immutable = True
+        return response
+
+    served, encoding, has_variants = source, None, False
+    if os.path.splitext(source)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+        source_mtime = os.stat(path).st_mtime
+        for name, suffix in ENCODINGS:
+            variant = path + suffix
+            if not os.path.isfile(variant) or os.stat(variant).st_mtime < source_mtime:
+                continue
+            has_variants = True
+            if encoding is None and request.accept_encodings[name]:
+                served, encoding = source + suffix, name
+                etag = f"{etag}-{name}"  # each representation needs its own strong ETag
+
+    _ignore_multiple_ranges()
+    response = send_from_directory(
+        app.static_folder, served,
+        etag=etag,
+        max_age=max_age,
+        mimetype=_mimetype(source),
+    )
+    if encoding:
+        response.content_encoding = encoding
+    if has_variants:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def _ignore_multiple_ranges():
+    """Serve the whole file for multi-range requests instead of a 416.
+
+    Werkzeug only does single ranges; RFC 9110 lets a server ignore Range.
+    """
+    parsed = parse_range_header(request.environ.get('HTTP_RANGE'))
+    if parsed is not None and len(parsed.ranges) > 1:
+        del request.environ['HTTP_RANGE']
+
+
+def _offload(app, filename, etag, mimetype, max_age):
+    """Headers-only response telling the front proxy which file to send."""
+    mode = app.config['STATIC_OFFLOAD']
+    if mode not in OFFLOAD_HEADERS:
+        raise ValueError(f"STATIC_OFFLOAD must be one of {sorted(OFFLOAD_HEADERS)}, not {mode!r}")
+    path = os.path.join(app.static_folder, filename)
+    response = app.response_class(mimetype=mimetype)
+    response.set_etag(etag)
+    response.last_modified = int(os.stat(path).st_mtime)
+    if max_age is None:
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    response.make_conditional(request)
+    if response.status_code == 200:
+        if mode == 'x-accel-redirect':
+            target = app.config['STATIC_OFFLOAD_PREFIX'].rstrip('/') + '/' + filename
+        else:
+            target = os.path.abspath(path)
+        response.headers[OFFLOAD_HEADERS[mode]] = target
+        response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _mimetype(filename):
+    mimetype, _ = mimetypes.guess_type(filename)
+    return mimetype or 'application/octet-stream'
+
+
+def init_app(app):
+    app.config.setdefault('ASSET_FINGERPRINTING', True)
+    app.config.setdefault('STATIC_OFFLOAD', None)
+    # nginx `internal` location aliased to the static folder
+    app.config.setdefault('STATIC_OFFLOAD_PREFIX', '/_protected_static/')
+    app.extensions['assets'] = AssetManifest(load_manifest(app.static_folder))
+    app.url_defaults(_rewrite_static_url)
+    app.view_functions['static'] = serve_static
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] not in (['build'], ['compress']):
+        print('usage: python assets.py build|compress [STATIC_DIR]')
+        return 2
+    static_folder = argv[1] if len(argv) > 1 else 'static'
+    written = compress_static(static_folder)
+    print(f"Wrote {written} precompressed files" + ('' if brotli else ' (gzip only; install brotli for .br)'))
+    if argv[0] == 'build':
+        manifest = write_manifest(static_folder)
+        print(f"Wrote {Path(static_folder) / MANIFEST_NAME} ({len(manifest)} assets)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+HTTP load benchmark for every route at several database sizes.
+
+For each size the projects table is seeded with synthetic rows (seeded
+databases are kept in benchmarks/data/ and copied before each run, so
+POST /contact doesn't skew the next one). Every GET route without
+arguments (skipping freeze.FREEZE_SKIP), a project detail page, a few
+listing/search variants, a static file and POST /contact with and
+without an upload are then driven
+
+- through the Flask test client, one request at a time, and
+- through a real threaded WSGI server on localhost with --concurrency
+  client threads.
+
+p50/p95/p99 latency and requests/sec per route go to a JSON report. With
+--baseline the run is compared against an earlier report and exits 1 when
+a route's p95 grew, or its throughput fell, by more than --threshold.
+
+    python benchmarks/bench_http.py                         # 10, 1k, 100k rows
+    python benchmarks/bench_http.py --large                 # ... and 1M rows (slow to seed)
+    python benchmarks/bench_http.py --sizes 10 1000 --requests 50
+    python benchmarks/bench_http.py --save-baseline         # record benchmarks/baseline.json
+    python benchmarks/bench_http.py --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import http.client
+import io
+import json
+import logging
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import DAL  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+DEFAULT_SIZES = (10, 1000, 100000)
+LARGE_SIZE = 1000000  # only with --large
+DEFAULT_REPORT = Path(__file__).resolve().parent / 'results.json'
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+UPLOAD_IMAGE = ROOT / 'static' / 'images' / DAL.DEFAULT_IMAGE
+# Differences smaller than this are noise on any machine
+MIN_REGRESSION_MS = 1.0
+
+WORDS = (
+    'design research prototype feedback mobile library interface model vision career '
+    'resource survey insight workflow dashboard accessibility campus student migration '
+    'filter analytics usability interview persona journey content strategy testing'
+).split()
+RARE_WORD = 'zeppelin'
+
+
+def synthetic_projects(count, seed=1):
+    """Deterministic fake projects; one in ~1000 mentions RARE_WORD."""
+    rng = random.Random(seed)
+    for n in range(count):
+        words = rng.sample(WORDS, 3)
+        description = ' '.join(rng.choice(WORDS) for _ in range(20))
+        if n % 1000 == 0:
+            description += f" {RARE_WORD}"
+        yield {
+            'title': f"{' '.join(words).title()} {n}",
+            'description': description,
+            'image_file_name': DAL.DEFAULT_IMAGE,
+        }
+
+
+def seeded_database(rows):
+    """Path to a database with the seed projects plus synthetic rows, building it once."""
+    path = DATA_DIR / f"projects-{rows}.db"
+    if path.exists():
+        return path
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    building = path.with_suffix('.building')
+    for stale in DATA_DIR.glob(building.name + '*'):
+        stale.unlink()
+    DAL.DB_PATH = building
+    DAL.init_db()
+    DAL.seed_projects()
+    stats = DAL.bulk_insert_projects(synthetic_projects(max(0, rows - 3)))
+    with DAL.get_connection() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    DAL.close_all_connections()
+    building.rename(path)
+    print(f"Seeded {rows} rows in {stats['seconds']:.1f}s -> {path}")
+    return path
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, wall_seconds, errors):
+    latencies = sorted(latencies)
+    ms = [value * 1000 for value in latencies]
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else 0.0,
+        'req_per_sec': round(len(latencies) / wall_seconds, 1) if wall_seconds else 0.0,
+    }
+
+
+def multipart(fields, files):
+    """Encode form fields and (name, filename, bytes) files as multipart/form-data."""
+    boundary = f"bench{random.getrandbits(64):x}"
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, data in files:
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                   f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+        body.write(data + b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+class Scenario:
+    """One benchmarked request: a GET URL, or a POST /contact that makes a new form each time."""
+
+    def __init__(self, name, url, method='GET', upload=False):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.upload = upload
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def form(self):
+        with self._lock:
+            self._counter += 1
+            n = self._counter
+        fields = {'title': f"Benchmark Submission {n}", 'description': 'Submitted by the HTTP benchmark'}
+        # Unique trailing bytes give every upload its own content hash, so none are deduplicated
+        files = [('image', 'bench.png', UPLOAD_IMAGE.read_bytes() + f"#{n}-{time.time_ns()}".encode())] if self.upload else []
+        return fields, files
+
+    def client_request(self, client):
+        if self.method == 'GET':
+            response = client.get(self.url)
+            response.get_data()
+            return response.status_code
+        fields, files = self.form()
+        data = dict(fields, **{name: (io.BytesIO(content), filename) for name, filename, content in files})
+        return client.post(self.url, data=data, content_type='multipart/form-data').status_code
+
+    def http_request(self, host, port):
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        try:
+            if self.method == 'GET':
+                conn.request('GET', self.url)
+            else:
+                body, content_type = multipart(*self.form())
+                conn.request('POST', self.url, body=body, headers={'Content-Type': content_type})
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+
+def scenarios(app, rows):
+    import freeze
+    from flask import url_for
+    with app.test_request_context():
+        urls = [
+            url_for(rule.endpoint) for rule in app.url_map.iter_rules()
+            if 'GET' in rule.methods and not rule.arguments and rule.endpoint not in freeze.FREEZE_SKIP
+        ]
+    middle = DAL.get_projects_page(after=max(0, rows // 2 - 1), limit=1)['projects'][0]['slug']
+    found = [Scenario(url, url) for url in urls]
+    found += [
+        Scenario('/projects/<slug>', f"/projects/{middle}"),
+        Scenario('/projects?after=<middle>', f"/projects?after={max(1, rows // 2)}"),
+        Scenario('/projects?q=<common>', '/projects?q=design'),
+        Scenario('/projects?q=<rare>', f"/projects?q={RARE_WORD}"),
+        Scenario('/api/projects?limit=50', '/api/projects?limit=50'),
+        Scenario('/api/projects?after=<middle>&format=ndjson&limit=500',
+                 f"/api/projects?after={max(1, rows // 2)}&format=ndjson&limit=500"),
+        Scenario('/api/projects/<slug>', f"/api/projects/{middle}"),
+        Scenario('/static/css/styles.css', '/static/css/styles.css'),
+        Scenario('POST /contact', '/contact', method='POST'),
+        Scenario('POST /contact (upload)', '/contact', method='POST', upload=True),
+    ]
+    return found
+
+
+def run_client(app, scenario, count):
+    latencies, errors = [], 0
+    with app.test_client() as client:
+        started = time.perf_counter()
+        for _ in range(count):
+            t = time.perf_counter()
+            status = scenario.client_request(client)
+            latencies.append(time.perf_counter() - t)
+            errors += status >= 400
+        wall = time.perf_counter() - started
+    return summarize(latencies, wall, errors)
+
+
+def run_server(server, scenario, count, concurrency):
+    host, port = server.server_address[:2]
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def one(_):
+        t = time.perf_counter()
+        try:
+            failed = scenario.http_request(host, port) >= 400
+        except OSError:
+            failed = True
+        elapsed = time.perf_counter() - t
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(count)))
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def bench_size(rows, modes, count, concurrency, work_dir):
+    db_path = work_dir / f"bench-{rows}.db"
+    shutil.copyfile(seeded_database(rows), db_path)
+    DAL.DB_PATH = db_path
+    DAL.close_all_connections()
+
+    import app as app_module
+    from werkzeug.serving import make_server
+    app = app_module.app
+    app.extensions['page_cache'].clear()
+    app_module.UPLOAD_FOLDER = work_dir / 'images'
+    shutil.rmtree(app_module.UPLOAD_FOLDER, ignore_errors=True)
+    app_module.UPLOAD_FOLDER.mkdir(parents=True)
+    # Copy the images the rows point at, so the metadata backfill can probe them
+    with DAL.get_connection() as conn:
+        names = {row[0] for row in conn.execute("SELECT DISTINCT image_file_name FROM projects")}
+    for name in names | {DAL.DEFAULT_IMAGE}:  # contact uploads fall back to the default
+        if (UPLOAD_IMAGE.parent / name).is_file():
+            shutil.copyfile(UPLOAD_IMAGE.parent / name, app_module.UPLOAD_FOLDER / name)
+
+    results = {}
+    for scenario in scenarios(app, rows):
+        if 'client' in modes:
+            results[f"{rows}/client/{scenario.name}"] = run_client(app, scenario, count)
+        if 'server' in modes:
+            server = make_server('127.0.0.1', 0, app, threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                results[f"{rows}/server/{scenario.name}"] = run_server(server, scenario, count, concurrency)
+            finally:
+                server.shutdown()
+        for key in [k for k in results if k.endswith(f"/{scenario.name}") and k.startswith(f"{rows}/")]:
+            r = results[key]
+            print(f"{key:<58} p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  p99 {r['p99_ms']:>8.2f} ms"
+                  f"  {r['req_per_sec']:>8.1f} req/s" + (f"  {r['errors']} errors" if r['errors'] else ''))
+    app.extensions['jobs'].join()  # let queued submissions finish before the database goes away
+    DAL.close_all_connections()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Routes that got slower or lost throughput beyond threshold; returns a list of messages."""
+    regressions = []
+    for key, before in sorted(baseline.get('results', {}).items()):
+        after = results.get(key)
+        if after is None:
+            continue
+        if (after['p95_ms'] > before['p95_ms'] * (1 + threshold)
+                and after['p95_ms'] - before['p95_ms'] >= MIN_REGRESSION_MS):
+            regressions.append(f"{key}: p95 {before['p95_ms']:.2f} -> {after['p95_ms']:.2f} ms")
+        if before['req_per_sec'] and after['req_per_sec'] < before['req_per_sec'] * (1 - threshold):
+            regressions.append(f"{key}: {before['req_per_sec']:.1f} -> {after['req_per_sec']:.1f} req/s")
+        if after['errors'] > before['errors']:
+            regressions.append(f"{key}: {before['errors']} -> {after['errors']} errors")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP load and scaling benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Row counts to seed')
+    parser.add_argument('--large', action='store_true', help=f'Also run with {LARGE_SIZE} rows')
+    parser.add_argument('--modes', nargs='+', choices=['client', 'server'], default=['client', 'server'])
+    parser.add_argument('--requests', type=int, default=100, help='Requests per route and mode')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads against the WSGI server')
+    parser.add_argument('--output', default=str(DEFAULT_REPORT), help='JSON report path')
+    parser.add_argument('--baseline', help='Compare against this earlier report')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Also write the report to {DEFAULT_BASELINE}')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative regression (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no access log line per request
+    if args.large and LARGE_SIZE not in args.sizes:
+        args.sizes.append(LARGE_SIZE)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        original_db_path = DAL.DB_PATH
+        try:
+            for rows in args.sizes:
+                results.update(bench_size(rows, args.modes, args.requests, args.concurrency, Path(tmp)))
+        finally:
+            DAL.close_all_connections()
+            DAL.DB_PATH = original_db_path
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    print(f"Wrote {args.output}")
+    if args.save_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        print(f"Wrote {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for message in regressions:
+            print(f"[REGRESSION] {message}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Measure the memory cost of loading project rows.
+
+Seeds a throwaway database with N projects and reports, with tracemalloc:
+
+- bytes per row held by a list of dict(sqlite3.Row) (the old cache format,
+  still what get_all_projects() returns),
+- bytes per row held by a list of DAL.Project records (get_projects()),
+- peak allocation while walking every row with DAL.iter_projects().
+
+Field strings are shared by both formats and counted in each; the
+difference between the first two lines is the container overhead.
+"""
+
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import DAL  # noqa: E402
+
+
+def measure(load):
+    """(bytes still held by load()'s result, peak bytes while running it)"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def load_dicts():
+    with DAL.get_connection() as conn:
+        rows = conn.execute(f"SELECT {DAL.PROJECT_COLUMNS} FROM projects ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+
+def load_records():
+    with DAL.get_connection() as conn:
+        return DAL._select_projects(conn, "ORDER BY id").fetchall()
+
+
+def walk_records():
+    count = 0
+    for _ in DAL.iter_projects():
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Project row memory benchmark')
+    parser.add_argument('--rows', type=int, default=50000, help='Number of projects to seed')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        DAL.DB_PATH = Path(tmp) / 'bench.db'
+        DAL.init_db()
+        DAL.bulk_insert_projects(
+            {'title': f'Project {i}', 'description': f'Benchmark row number {i}'} for i in range(args.rows)
+        )
+        with DAL.get_connection():
+            pass  # open the pooled connection outside the measurements
+
+        print(f"{'format':<24} {'bytes/row':>10} {'peak MB':>10}")
+        for name, load in (('dict(sqlite3.Row)', load_dicts), ('Project', load_records),
+                           ('iter_projects()', walk_records)):
+            current, peak = measure(load)
+            print(f"{name:<24} {current / args.rows:>10.0f} {peak / 1e6:>10.1f}")
+        DAL.close_all_connections()
+
+
+if __name__ == '__main__':
+    main()
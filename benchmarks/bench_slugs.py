@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark slug allocation when many projects share a title.
+
+Inserts N projects titled "Untitled Project" into a throwaway database and
+reports the insert cost per block of collisions. With the slug counter the
+per-insert time should stay flat as the number of existing 'untitled-project-N'
+rows grows.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import DAL  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Slug allocation benchmark')
+    parser.add_argument('--count', type=int, default=2000, help='Number of colliding inserts')
+    parser.add_argument('--block', type=int, default=250, help='Report every N inserts')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        DAL.DB_PATH = Path(tmp) / 'bench.db'
+        DAL.init_db()
+
+        print(f"{'collisions':>12} {'us/insert':>12}")
+        start = time.perf_counter()
+        for i in range(1, args.count + 1):
+            DAL.insert_project('Untitled Project', 'Benchmark row', 'Image-Coming-Soon.png')
+            if i % args.block == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{i:>12} {elapsed / args.block * 1e6:>12.1f}")
+                start = time.perf_counter()
+        DAL.close_all_connections()
+
+
+if __name__ == '__main__':
+    main()
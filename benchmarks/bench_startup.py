@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Measure cold start: importing the app and serving the first request.
+
+Each measurement runs in a fresh interpreter, as a new worker would:
+
+- import:           `import app` (builds the app; no database access)
+- first request:    import plus GET / against a database that is already
+                    migrated, i.e. what every worker after the first pays
+- fresh database:   import plus GET / against an empty file, which runs
+                    the migrations and seeds it (once per deployment)
+- GET /about:       the first and second GET /about in a worker, with
+                    and without compiled templates in the bytecode cache
+
+With the bytecode cache warm (see templating.py), the first /about
+should cost about what the second does.
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / '.jinja_cache'
+
+SNIPPET = """
+import time
+started = time.perf_counter()
+import DAL
+DAL.DB_PATH = DAL.Path({db!r})
+import app
+imported = time.perf_counter()
+timings = [imported - started]
+if {request!r}:
+    client = app.app.test_client()
+    client.get('/')
+    timings.append(time.perf_counter() - started)
+    for _ in range(2):
+        t = time.perf_counter()
+        client.get('/about')
+        timings.append(time.perf_counter() - t)
+print(*timings)
+"""
+
+
+def run(db, request):
+    output = subprocess.run(
+        [sys.executable, '-c', SNIPPET.format(db=str(db), request=request)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return [float(value) for value in output]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Interpreters to start per measurement')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        migrated = Path(tmp) / 'migrated.db'
+        run(migrated, True)
+        imports, warm, fresh = [], [], []
+        cold_about, warm_about, steady_about = [], [], []
+        for n in range(args.runs):
+            imports.append(run(migrated, False)[0])
+            timings = run(migrated, True)
+            warm.append(timings[1])
+            warm_about.append(timings[2])
+            steady_about.append(timings[3])
+            fresh.append(run(Path(tmp) / f"fresh-{n}.db", True)[1])
+            shutil.rmtree(CACHE_DIR, ignore_errors=True)
+            cold_about.append(run(migrated, True)[2])
+
+    rows = (
+        ('import', imports),
+        ('first request', warm),
+        ('first request, fresh db', fresh),
+        ('first GET /about, no cache', cold_about),
+        ('first GET /about, cached', warm_about),
+        ('second GET /about', steady_about),
+    )
+    print(f"{'measurement':<28} {'median ms':>10} {'max ms':>10}")
+    for name, values in rows:
+        print(f"{name:<28} {statistics.median(values) * 1000:>10.1f} {max(values) * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
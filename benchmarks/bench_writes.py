@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent insert_project() calls.
+
+T threads each insert N projects into a throwaway database, first with one
+transaction and commit per insert (the path taken when the caller holds its
+own connection), then through the group-commit writer thread. Reports
+inserts/sec, "database is locked" failures and the writer's batch sizes.
+
+    python benchmarks/bench_writes.py --threads 16 --inserts 200
+    python benchmarks/bench_writes.py --max-batch 64 --max-latency 0.005
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import DAL  # noqa: E402
+
+
+def direct_insert(title):
+    with DAL.get_connection():  # holding a connection makes insert_project write inline
+        DAL.insert_project(title, 'Benchmark row', DAL.DEFAULT_IMAGE)
+
+
+def writer_insert(title):
+    DAL.insert_project(title, 'Benchmark row', DAL.DEFAULT_IMAGE)
+
+
+def run(insert, threads, inserts):
+    errors = []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(number):
+        barrier.wait()
+        for i in range(inserts):
+            try:
+                insert(f"Project {number % 4} {i % 10}")  # shared titles: slug collisions too
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent insert benchmark')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--inserts', type=int, default=200, help='Inserts per thread')
+    parser.add_argument('--max-batch', type=int, default=DAL.WRITER_MAX_BATCH)
+    parser.add_argument('--max-latency', type=float, default=DAL.WRITER_MAX_LATENCY)
+    args = parser.parse_args()
+    DAL.configure_writer(args.max_batch, args.max_latency)
+    total = args.threads * args.inserts
+
+    print(f"{'mode':<14} {'inserts/s':>10} {'locked':>8}")
+    for mode, insert in (('per-insert', direct_insert), ('group commit', writer_insert)):
+        with tempfile.TemporaryDirectory() as tmp:
+            DAL.DB_PATH = Path(tmp) / 'bench.db'
+            DAL.init_db()
+            seconds, errors = run(insert, args.threads, args.inserts)
+            print(f"{mode:<14} {(total - errors) / seconds:>10.0f} {errors:>8}")
+            DAL.close_all_connections()
+    stats = DAL.get_writer_stats()
+    print(f"writer: {stats['batches']} batches, {stats['inserts'] / max(1, stats['batches']):.1f} rows/batch, "
+          f"largest {stats['largest_batch']}")
+
+
+if __name__ == '__main__':
+    main()
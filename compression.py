@@ -0,0 +1,91 @@
+"""
+Optional on-the-fly compression of rendered HTML.
+
+Static files are precompressed at build time (see assets.py); this covers
+pages rendered by the app. Compressed bodies are kept in a small LRU keyed
+by a hash of the uncompressed body, so a page that renders the same bytes
+again is not recompressed. Streamed responses are passed through as-is.
+
+Enable with COMPRESS_HTML = True.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CompressionCache:
+    """LRU of compressed bodies keyed on (encoding, body digest)."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compress(self, body, encoding):
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=5)
+        else:
+            compressed = gzip.compress(body, compresslevel=6, mtime=0)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+def _choose_encoding():
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def init_app(app):
+    app.config.setdefault('COMPRESS_HTML', False)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_CACHE_SIZE', 64)
+    cache = CompressionCache(app.config['COMPRESS_CACHE_SIZE'])
+    app.extensions['compression'] = cache
+
+    @app.after_request
+    def compress_html(response):
+        if (
+            not app.config['COMPRESS_HTML']
+            or response.status_code != 200
+            or response.mimetype != 'text/html'
+            or response.is_streamed
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = _choose_encoding()
+        body = response.get_data()
+        if encoding is None or len(body) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(cache.compress(body, encoding))
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
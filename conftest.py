@@ -0,0 +1,26 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+import DAL
+
+
+@pytest.fixture
+def temp_db():
+    """Point DAL at a fresh, migrated temporary database for the test."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+    temp_file.close()
+    original_db_path = DAL.DB_PATH
+    DAL.DB_PATH = Path(temp_file.name)
+    DAL.init_db()
+
+    yield temp_file.name
+
+    DAL.close_all_connections()
+    DAL.DB_PATH = original_db_path
+    try:
+        os.unlink(temp_file.name)
+    except PermissionError:
+        pass  # Windows may still hold the file; the OS temp dir is cleaned eventually
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Freeze the site into static HTML.
+
+Every GET route is rendered through the Flask test client and written to
+OUTPUT/<path>/index.html, and static/ is copied to OUTPUT/static/ under
+both its plain and fingerprinted names (with any .gz/.br siblings), so the
+tree can be served by nginx or a CDN. Routes with URL arguments are
+expanded by generators registered in URL_GENERATORS.
+
+Incremental runs (the default) keep .freeze-state.json in the output
+directory. A page is re-rendered only when one of its inputs changed: the
+templates it renders (including extended/included ones), the asset
+manifest, or the project rows it displayed. After insert_project() that
+is just the listing and the new project's page. The listing also shows
+tags, so its fingerprint includes DAL.get_data_version(), which tag
+changes bump too.
+
+app.config['FREEZING'] is True while pages are rendered. A static server
+answers /projects?after=... or ?tag=... with /projects/index.html, so the
+listing then shows every project on one page and leaves out the tag
+filter links.
+
+    python freeze.py                 # incremental build into ./build
+    python freeze.py --output dist --full
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from flask import template_rendered, url_for
+from jinja2 import meta
+
+import assets
+import DAL
+
+OUTPUT_DIR = Path('build')
+STATE_FILE = '.freeze-state.json'
+FREEZE_SKIP = {'static', 'metrics', 'profiler_index', 'api_projects'}
+# endpoint -> callable returning an iterable of view-argument dicts
+URL_GENERATORS = {}
+
+
+def url_generator(endpoint):
+    """Register a function listing the view arguments to freeze for `endpoint`."""
+    def decorator(fn):
+        URL_GENERATORS[endpoint] = fn
+        return fn
+    return decorator
+
+
+def _hash(value):
+    data = value if isinstance(value, bytes) else json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def page_urls(app):
+    """Every freezable GET URL, in url_map order."""
+    urls = []
+    with app.test_request_context():
+        for rule in app.url_map.iter_rules():
+            if rule.endpoint in FREEZE_SKIP or 'GET' not in rule.methods:
+                continue
+            if rule.arguments:
+                generator = URL_GENERATORS.get(rule.endpoint)
+                values_list = generator() if generator else []
+            else:
+                values_list = [{}]
+            for values in values_list:
+                url = url_for(rule.endpoint, **values)
+                if url not in urls:
+                    urls.append(url)
+    return urls
+
+
+def output_path(output_dir, url):
+    relative = url.strip('/')
+    return Path(output_dir) / relative / 'index.html' if relative else Path(output_dir) / 'index.html'
+
+
+class TemplateHasher:
+    """Hash of a template's source together with everything it extends or includes."""
+
+    def __init__(self, env):
+        self.env = env
+        self._cache = {}
+
+    def _source(self, name):
+        return self.env.loader.get_source(self.env, name)[0]
+
+    def __call__(self, name, _seen=None):
+        if name in self._cache:
+            return self._cache[name]
+        seen = _seen or set()
+        seen.add(name)
+        source = self._source(name)
+        parts = [source]
+        for child in sorted(filter(None, meta.find_referenced_templates(self.env.parse(source)))):
+            if child not in seen:
+                parts.append(self(child, seen))
+        digest = _hash('\0'.join(parts).encode())
+        self._cache[name] = digest
+        return digest
+
+
+def _data_dependency(context):
+    """What project data a rendered template showed, as a JSON-friendly key."""
+    if 'projects' in context:
+        return ['projects']
+    project = context.get('project')
+    if isinstance(project, DAL.Project):
+        return ['project', project.slug]
+    if isinstance(project, dict) and 'slug' in project:
+        return ['project', project['slug']]
+    return None
+
+
+def _data_fingerprint(dependency):
+    if dependency is None:
+        return None
+    if dependency[0] == 'project':
+        return _hash(DAL.get_project_by_slug(dependency[1]))
+    projects = DAL.get_all_projects()
+    variants = DAL.get_image_variants(p['image_file_name'] for p in projects)
+    return _hash([DAL.get_data_version(), projects, variants])
+
+
+def _fingerprint(record, template_hash, manifest_hash):
+    """Current fingerprint for a previously rendered page's inputs."""
+    try:
+        templates = {name: template_hash(name) for name in record['templates']}
+    except Exception:
+        return None  # a template went away; re-render
+    return _hash({
+        'templates': templates,
+        'manifest': manifest_hash,
+        'data': [_data_fingerprint(dep) for dep in record['data']],
+    })
+
+
+def _copy_static(app, output_dir, manifest, previous):
+    """Copy static files (and fingerprinted copies) that changed; returns (state, copied)."""
+    static_folder = Path(app.static_folder)
+    state, copied = {}, 0
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            if name.startswith('.'):
+                continue
+            source = Path(root) / name
+            filename = source.relative_to(static_folder).as_posix()
+            digest = assets.file_digest(source)
+            state[filename] = digest
+            base, suffix = filename, ''
+            for encoded in assets.ENCODED_SUFFIXES:
+                if filename.endswith(encoded):
+                    base, suffix = filename[:-len(encoded)], encoded
+            targets = [filename]
+            if base in manifest:
+                targets.append(manifest[base] + suffix)
+            for target in targets:
+                destination = Path(output_dir) / 'static' / target
+                if previous.get(filename) == digest and destination.exists():
+                    continue
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, destination)
+                copied += 1
+    return state, copied
+
+
+def freeze(app, output_dir=OUTPUT_DIR, incremental=True):
+    """Render the site into output_dir and return build stats."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state_path = output_dir / STATE_FILE
+    previous = json.loads(state_path.read_text()) if incremental and state_path.exists() else {}
+    old_pages = previous.get('pages', {})
+
+    # Fresh manifest so frozen pages link to what is actually being copied.
+    manifest = assets.build_manifest(app.static_folder)
+    app.extensions['assets'] = assets.AssetManifest(manifest)
+    manifest_hash = _hash(manifest)
+    template_hash = TemplateHasher(app.jinja_env)
+
+    pages, rendered, skipped, errors = {}, 0, 0, []
+    captured = []
+
+    def capture(sender, template, context, **extra):
+        captured.append((template.name, _data_dependency(context)))
+
+    page_cache_enabled = app.config.get('PAGE_CACHE_ENABLED')
+    freezing = app.config.get('FREEZING')
+    app.config['PAGE_CACHE_ENABLED'] = False  # every render must emit template_rendered
+    app.config['FREEZING'] = True
+    template_rendered.connect(capture, app)
+    try:
+        client = app.test_client()
+        for url in page_urls(app):
+            target = output_path(output_dir, url)
+            record = old_pages.get(url)
+            if record and target.exists() and record['fingerprint'] == _fingerprint(record, template_hash, manifest_hash):
+                pages[url] = record
+                skipped += 1
+                continue
+
+            captured.clear()
+            response = client.get(url)
+            if response.status_code != 200:
+                errors.append((url, response.status_code))
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(response.data)
+            record = {
+                'templates': sorted({name for name, _ in captured}),
+                'data': [dep for _, dep in captured if dep is not None],
+            }
+            record['fingerprint'] = _fingerprint(record, template_hash, manifest_hash)
+            pages[url] = record
+            rendered += 1
+    finally:
+        template_rendered.disconnect(capture, app)
+        app.config['PAGE_CACHE_ENABLED'] = page_cache_enabled
+        app.config['FREEZING'] = freezing
+
+    removed = 0
+    for url in set(old_pages) - set(pages):
+        stale = output_path(output_dir, url)
+        if stale.exists():
+            stale.unlink()
+            removed += 1
+
+    static_state, copied = _copy_static(app, output_dir, manifest, previous.get('static', {}))
+    state_path.write_text(json.dumps({'pages': pages, 'static': static_state}, indent=1, sort_keys=True))
+    return {'rendered': rendered, 'skipped': skipped, 'removed': removed, 'copied': copied, 'errors': errors}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Freeze the site into static files')
+    parser.add_argument('--output', default=str(OUTPUT_DIR), help='Output directory')
+    parser.add_argument('--full', action='store_true', help='Ignore saved state and re-render everything')
+    args = parser.parse_args(argv)
+
+    from app import app
+    stats = freeze(app, args.output, incremental=not args.full)
+    print(f"Rendered {stats['rendered']} pages, {stats['skipped']} unchanged, "
+          f"removed {stats['removed']}, copied {stats['copied']} static files into {args.output}")
+    for url, status in stats['errors']:
+        print(f"[FAILED] {url} returned {status}")
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Image dimensions from file headers, plus a placeholder colour.
+
+probe() reads only as much of a PNG, JPEG, GIF or WebP file as it takes to
+find the pixel size: the first 30 bytes for PNG/GIF/WebP, and for JPEG the
+marker segments up to the first SOF frame header. A JPEG's EXIF
+orientation is honoured, since browsers display the image rotated. No
+Pillow is needed and the image is never decoded.
+
+placeholder_color() returns the dominant colour as '#rrggbb' for painting
+the image box while the real image loads. It needs Pillow and decodes
+JPEGs at 1/8 scale (other formats are decoded in full, then shrunk to
+32x32 and quantized).
+
+The results are stored in the projects table (image_width, image_height,
+image_color), so pages get intrinsic sizes without touching the files.
+
+    python imagemeta.py backfill          # projects whose image has no metadata yet
+    python imagemeta.py backfill --force  # every project image
+"""
+
+import argparse
+import logging
+import struct
+import sys
+from pathlib import Path
+
+import DAL
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - exercised only without Pillow
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = Path('static/images')
+HEADER_BYTES = 30
+PLACEHOLDER_SIZE = (32, 32)
+PLACEHOLDER_COLORS = 5
+
+# Start-of-frame markers carrying the frame size (not DHT C4, JPG C8 or DAC CC)
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+EXIF_ORIENTATION = 0x0112
+
+
+def _png(header):
+    if header[:8] == b'\x89PNG\r\n\x1a\n' and header[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', header[16:24])
+        return width, height, 'image/png'
+    return None
+
+
+def _gif(header):
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', header[6:10])
+        return width, height, 'image/gif'
+    return None
+
+
+def _webp(header):
+    if header[:4] != b'RIFF' or header[8:12] != b'WEBP' or len(header) < 30:
+        return None
+    chunk = header[12:16]
+    if chunk == b'VP8 ' and header[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF, 'image/webp'
+    if chunk == b'VP8L' and header[20] == 0x2F:
+        bits = int.from_bytes(header[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, 'image/webp'
+    if chunk == b'VP8X':
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return width, height, 'image/webp'
+    return None
+
+
+def _exif_orientation(data):
+    """Orientation tag (1-8) from an APP1 Exif payload, or None."""
+    if data[:6] != b'Exif\0\0':
+        return None
+    tiff = data[6:]
+    order = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if order is None or len(tiff) < 8:
+        return None
+    (ifd,) = struct.unpack(order + 'I', tiff[4:8])
+    if ifd + 2 > len(tiff):
+        return None
+    (count,) = struct.unpack(order + 'H', tiff[ifd:ifd + 2])
+    for entry in range(ifd + 2, min(ifd + 2 + count * 12, len(tiff) - 11), 12):
+        tag, kind = struct.unpack(order + 'HH', tiff[entry:entry + 4])
+        if tag == EXIF_ORIENTATION and kind == 3:  # SHORT
+            return struct.unpack(order + 'H', tiff[entry + 8:entry + 10])[0]
+    return None
+
+
+def _jpeg(f, header):
+    if header[:2] != b'\xff\xd8':
+        return None
+    f.seek(2)
+    orientation = None
+    while True:
+        byte = f.read(1)
+        if byte != b'\xff':
+            return None
+        marker = f.read(1)
+        while marker == b'\xff':  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in JPEG_STANDALONE:
+            continue
+        if marker in (0xD9, 0xDA):  # end of image / start of scan before any frame header
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack('>H', length_bytes)
+        if marker in JPEG_SOF:
+            segment = f.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack('>HH', segment[1:5])
+            if orientation in (5, 6, 7, 8):  # rotated by 90 degrees
+                width, height = height, width
+            return width, height, 'image/jpeg'
+        if marker == 0xE1 and orientation is None:
+            orientation = _exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, 1)
+
+
+def probe(path):
+    """{'width', 'height', 'mime_type'} read from the file header, or None if unrecognised."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_BYTES)
+            found = _png(header) or _gif(header) or _webp(header) or _jpeg(f, header)
+    except (OSError, struct.error) as e:
+        logger.warning("Cannot probe %s: %s", path, e)
+        return None
+    if found is None or not found[0] or not found[1]:
+        return None
+    width, height, mime_type = found
+    return {'width': width, 'height': height, 'mime_type': mime_type}
+
+
+def placeholder_color(path):
+    """Dominant colour as '#rrggbb', or None without Pillow or for unreadable files."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            image.draft('RGB', PLACEHOLDER_SIZE)  # JPEG: let the decoder downscale by up to 1/8
+            image.thumbnail(PLACEHOLDER_SIZE)
+            image = image.convert('RGBA')
+    except (OSError, ValueError) as e:
+        logger.warning("Cannot sample %s: %s", path, e)
+        return None
+    # Transparent pixels show the page background, which is white
+    flattened = Image.new('RGBA', image.size, (255, 255, 255, 255))
+    flattened.alpha_composite(image)
+    quantized = flattened.convert('RGB').quantize(colors=PLACEHOLDER_COLORS)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def describe(image_file_name, images_dir=IMAGES_DIR, color=True):
+    """{'width', 'height', 'color'} for an image under images_dir; unknown values are None."""
+    path = Path(images_dir) / image_file_name
+    size = probe(path) or {}
+    return {
+        'width': size.get('width'),
+        'height': size.get('height'),
+        'color': placeholder_color(path) if color and size else None,
+    }
+
+
+def backfill(images_dir=IMAGES_DIR, force=False):
+    """Fill in image metadata for project images; returns (updated, unreadable)."""
+    updated = unreadable = 0
+    for image_file_name in DAL.get_project_images(missing_meta=not force):
+        meta = describe(image_file_name, images_dir)
+        if meta['width'] is None:
+            unreadable += 1
+            continue
+        DAL.save_image_meta(image_file_name, meta)
+        updated += 1
+    return updated, unreadable
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Project image metadata')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subcommands.add_parser('backfill', help='Probe project images missing metadata')
+    backfill_parser.add_argument('--images-dir', default=str(IMAGES_DIR))
+    backfill_parser.add_argument('--force', action='store_true', help='Re-probe images that already have metadata')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if Image is None:
+        print('Pillow is not installed; recording sizes without placeholder colours')
+    DAL.init_db()
+    updated, unreadable = backfill(args.images_dir, force=args.force)
+    print(f"Updated {updated} images, {unreadable} unreadable")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Responsive image derivatives for project images.
+
+For each source image under static/images this writes a few width-bounded
+copies (in the source format and as WebP) to static/images/derived/ and
+records them in the image_variants table, so templates can emit
+srcset/sizes and browsers fetch the smallest adequate file.
+
+Resizing needs Pillow. Without it the pipeline is a no-op and pages keep
+serving the original images.
+
+    python images.py backfill          # process every image in static/images
+    python images.py backfill --force  # regenerate even if derivatives are current
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import DAL
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - exercised only without Pillow
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = Path('static/images')
+DERIVED_DIR = 'derived'
+VARIANT_WIDTHS = (160, 320, 640)
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+
+
+def available():
+    """True when Pillow is installed and derivatives can be generated."""
+    return Image is not None
+
+
+def _derived_name(image_file_name, width, extension):
+    stem = Path(image_file_name).with_suffix('')
+    return f"{DERIVED_DIR}/{stem.as_posix()}-{width}w{extension}"
+
+
+def _save(image, path, fmt):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == 'JPEG':
+        image.convert('RGB').save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == 'WEBP':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(path, fmt, optimize=True)
+
+
+def generate_variants(image_file_name, images_dir=IMAGES_DIR, widths=VARIANT_WIDTHS):
+    """Write derivatives for one image and return their descriptions.
+
+    The result always starts with the original itself, followed by a copy
+    in the original format and a WebP copy for every width in `widths`
+    narrower than the original. Animated GIFs only get the original entry.
+    Raises OSError (including Pillow's UnidentifiedImageError) for files
+    that are not readable images.
+    """
+    source = Path(images_dir) / image_file_name
+    with Image.open(source) as original:
+        fmt = original.format
+        variants = [{
+            'file_name': image_file_name,
+            'width': original.width,
+            'height': original.height,
+            'mime_type': MIME_TYPES.get(fmt, 'application/octet-stream'),
+        }]
+        if fmt not in MIME_TYPES or getattr(original, 'is_animated', False):
+            return variants
+
+        targets = sorted(w for w in widths if w < original.width)
+        if fmt == 'JPEG' and targets:
+            # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding
+            widest = max(targets)
+            original.draft('RGB', (widest, round(original.height * widest / original.width)))
+        image = ImageOps.exif_transpose(original)
+        if (image.width > image.height) != (original.width > original.height):
+            # EXIF orientation rotated it; browsers display it rotated too
+            variants[0]['width'], variants[0]['height'] = variants[0]['height'], variants[0]['width']
+        extension = '.jpg' if fmt == 'JPEG' else source.suffix.lower()
+        outputs = [(fmt, extension)]
+        if fmt != 'WEBP':
+            outputs.append(('WEBP', '.webp'))
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            for out_fmt, out_ext in outputs:
+                name = _derived_name(image_file_name, width, out_ext)
+                _save(resized, Path(images_dir) / name, out_fmt)
+                variants.append({
+                    'file_name': name,
+                    'width': width,
+                    'height': height,
+                    'mime_type': MIME_TYPES[out_fmt],
+                })
+    return variants
+
+
+def process_image(image_file_name, images_dir=IMAGES_DIR):
+    """Generate and record derivatives for one image; never raises.
+
+    Returns the recorded variants, or an empty list when Pillow is missing
+    or the file can't be decoded (the page then falls back to the original).
+    """
+    if not available():
+        return []
+    try:
+        variants = generate_variants(image_file_name, images_dir=images_dir)
+    except (OSError, ValueError) as e:
+        logger.warning("Skipping derivatives for %s: %s", image_file_name, e)
+        return []
+    DAL.save_image_variants(image_file_name, variants)
+    return variants
+
+
+def _is_current(image_file_name, images_dir):
+    source = Path(images_dir) / image_file_name
+    recorded = DAL.get_image_variants([image_file_name]).get(image_file_name)
+    if not recorded:
+        return False
+    source_mtime = source.stat().st_mtime
+    for variant in recorded:
+        path = Path(images_dir) / variant['file_name']
+        if not path.exists() or path.stat().st_mtime < source_mtime:
+            return False
+    return True
+
+
+def backfill(images_dir=IMAGES_DIR, force=False):
+    """Process every source image under images_dir; returns (processed, skipped, failed)."""
+    images_dir = Path(images_dir)
+    processed = skipped = failed = 0
+    for path in sorted(images_dir.rglob('*')):
+        relative = path.relative_to(images_dir)
+        if (not path.is_file() or path.suffix.lower() not in SOURCE_EXTENSIONS
+                or relative.parts[0] == DERIVED_DIR or path.name.startswith('.')):
+            continue
+        name = relative.as_posix()
+        if not force and _is_current(name, images_dir):
+            skipped += 1
+        elif process_image(name, images_dir=images_dir):
+            processed += 1
+        else:
+            failed += 1
+    return processed, skipped, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Responsive image derivative pipeline')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subcommands.add_parser('backfill', help='Generate derivatives for existing images')
+    backfill_parser.add_argument('--images-dir', default=str(IMAGES_DIR))
+    backfill_parser.add_argument('--force', action='store_true', help='Regenerate current derivatives too')
+    args = parser.parse_args(argv)
+
+    if not available():
+        print('[FAILED] Pillow is not installed; run: pip install Pillow')
+        return 1
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    DAL.init_db()
+    processed, skipped, failed = backfill(args.images_dir, force=args.force)
+    print(f"Processed {processed} images, {skipped} already current, {failed} unreadable")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
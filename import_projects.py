@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Bulk import projects from a JSONL or CSV file.
+
+Each JSONL line / CSV row needs `title` and `description` and may give an
+`image_file_name` (relative to static/images) and `tags` (a JSON list, or
+comma-separated in CSV). Records are streamed from
+the file and written in one transaction through DAL.bulk_insert_projects().
+
+    python import_projects.py resources.jsonl
+    python import_projects.py resources.csv --batch-size 5000
+    cat resources.jsonl | python import_projects.py - --format jsonl
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+
+import DAL
+
+
+def read_jsonl(stream):
+    """Yield one dict per non-blank line."""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line_number}: invalid JSON ({e.msg})") from e
+        if not isinstance(record, dict):
+            raise ValueError(f"line {line_number}: expected a JSON object")
+        yield record
+
+
+def read_csv(stream):
+    """Yield one dict per row, keyed by the header row."""
+    yield from csv.DictReader(stream)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def detect_format(path):
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if suffix == '.csv':
+        return 'csv'
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk import projects from JSONL or CSV')
+    parser.add_argument('path', help="File to import, or '-' for stdin")
+    parser.add_argument('--format', choices=sorted(READERS), help='Input format (default: from file extension)')
+    parser.add_argument('--batch-size', type=int, default=DAL.BULK_BATCH_SIZE,
+                        help='Rows per executemany batch')
+    parser.add_argument('--db', help=f'Database file (default: {DAL.DB_PATH})')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error('cannot tell the format from the file name; pass --format')
+    if args.db:
+        DAL.DB_PATH = Path(args.db)
+
+    DAL.init_db()
+    if args.path == '-':
+        stream = sys.stdin
+    else:
+        stream = open(args.path, newline='', encoding='utf-8')
+    try:
+        stats = DAL.bulk_insert_projects(READERS[fmt](stream), batch_size=args.batch_size)
+    except ValueError as e:
+        print(f"[FAILED] Import aborted, nothing was written: {e}")
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(f"Imported {stats['inserted']} projects in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:.0f} rows/sec)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
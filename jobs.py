@@ -0,0 +1,268 @@
+"""
+Background jobs.
+
+Work that doesn't need to finish before the response (image processing,
+the project insert) is persisted to the jobs table and run by a small pool
+of worker threads, so the request only pays for one INSERT.
+
+Jobs survive restarts: on startup anything still 'queued', or 'running'
+for longer than JOBS_STALE_AFTER seconds (the process died mid-job), is
+picked up again. A failing job is retried with a doubling delay
+(JOBS_RETRY_DELAY, then twice that, ...) until it has made
+JOBS_MAX_ATTEMPTS attempts, then marked 'failed' with its last error. The
+delay is stored in the job's run_after column, so it holds across
+restarts and workers; polling only picks up jobs that are due. Finished
+jobs are deleted JOBS_KEEP_DONE seconds after they complete (pruned
+while polling, at most once a minute); failed ones are kept for
+inspection. The in-memory queue is bounded by JOBS_MAX_QUEUE; jobs that don't
+fit stay in the table and workers fetch them when they run dry.
+
+With JOBS_EAGER (the default under app.testing) jobs run inline instead,
+and retry at once.
+
+    @jobs.handler('send_email')
+    def send_email(payload): ...
+
+    jobs.enqueue('send_email', {'to': ...})
+"""
+
+import contextlib
+import logging
+import queue
+import threading
+import time
+
+from flask import current_app
+
+import DAL
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+PRUNE_INTERVAL = 60.0  # seconds between deletions of old finished jobs
+
+
+def handler(kind):
+    """Register the function that runs jobs of `kind`; it receives the job's payload dict."""
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+class LatencyStats:
+    """Count, mean and max of a stream of durations."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def info(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+
+class JobQueue:
+    """Bounded queue of job ids feeding a pool of worker threads."""
+
+    def __init__(self, workers, max_queue, max_attempts, retry_delay, stale_after, poll_interval, app=None,
+                 keep_done=3600):
+        self.app = app  # workers run jobs inside its app context when given
+        self.keep_done = keep_done
+        self._next_prune = 0.0
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._queued = set()  # ids sitting in _queue or running here, so polling doesn't double-queue
+        self._threads = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {'enqueued': 0, 'completed': 0, 'retried': 0, 'failed': 0, 'overflowed': 0}
+        self.wait_latency = LatencyStats()
+        self.run_latency = LatencyStats()
+
+    def enqueue(self, kind, payload, eager=False):
+        """Persist a job and hand it to a worker (or run it now when eager); returns the job id."""
+        if kind not in HANDLERS:
+            raise ValueError(f"no handler registered for job kind '{kind}'")
+        job_id = DAL.create_job(kind, payload, self.max_attempts)
+        with self._lock:
+            self.stats['enqueued'] += 1
+        if eager:
+            while self.run(job_id, backoff=False) == 'retry':
+                pass
+        else:
+            self._offer(job_id)
+        return job_id
+
+    def _offer(self, job_id):
+        with self._lock:
+            if job_id in self._queued:
+                return True
+            try:
+                self._queue.put_nowait(job_id)
+            except queue.Full:
+                self.stats['overflowed'] += 1
+                return False
+            self._queued.add(job_id)
+            return True
+
+    def run(self, job_id, backoff=True):
+        """Run one job if it is queued and due; returns 'done', 'retry', 'failed' or None.
+
+        A failed attempt is rescheduled retry_delay * 2**(attempts - 1)
+        seconds ahead, or immediately without `backoff`.
+        """
+        job = DAL.claim_job(job_id)
+        if job is None:
+            return None
+        started = time.time()
+        self.wait_latency.add(started - job['created_at'])
+        try:
+            HANDLERS[job['kind']](job['payload'])
+        except Exception as e:
+            retry = job['attempts'] < job['max_attempts']
+            delay = self.retry_delay * 2 ** (job['attempts'] - 1) if backoff else 0.0
+            DAL.fail_job(job_id, f"{type(e).__name__}: {e}", retry=retry, delay=delay)
+            logger.warning("Job %s (%s) attempt %s failed: %s", job_id, job['kind'], job['attempts'], e)
+            with self._lock:
+                self.stats['retried' if retry else 'failed'] += 1
+            return 'retry' if retry else 'failed'
+        finally:
+            self.run_latency.add(time.time() - started)
+        DAL.complete_job(job_id)
+        with self._lock:
+            self.stats['completed'] += 1
+        return 'done'
+
+    def _prune(self):
+        """Delete jobs that finished more than keep_done seconds ago, at most every PRUNE_INTERVAL."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_prune:
+                return
+            self._next_prune = now + PRUNE_INTERVAL
+        pruned = DAL.prune_done_jobs(self.keep_done)
+        if pruned:
+            logger.info("Pruned %s finished jobs", pruned)
+
+    def _fill_from_db(self):
+        """Queue persisted jobs nobody is working on; stops when the queue is full."""
+        self._prune()
+        for job_id in DAL.get_queued_job_ids(self._queue.maxsize or 100):
+            if not self._offer(job_id):
+                break
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                job_id = self._queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                try:
+                    self._fill_from_db()
+                except Exception:
+                    logger.exception("Polling the jobs table failed")
+                continue
+            try:
+                with self.app.app_context() if self.app is not None else contextlib.nullcontext():
+                    self.run(job_id)  # a retry is picked up again by polling once its run_after passes
+            except Exception:
+                logger.exception("Job %s could not be run", job_id)
+            finally:
+                with self._lock:
+                    self._queued.discard(job_id)
+                self._queue.task_done()
+
+    def start(self):
+        """Recover interrupted jobs and start the worker threads (once)."""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        recovered = DAL.requeue_stale_jobs(self.stale_after)
+        if recovered:
+            logger.info("Requeued %s interrupted jobs", recovered)
+        self._fill_from_db()
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def join(self):
+        """Block until every job handed to the queue so far has been processed."""
+        self._queue.join()
+
+    def info(self):
+        with self._lock:
+            depth = self._queue.qsize()
+            info = dict(self.stats, depth=depth, in_flight=len(self._queued) - depth)
+        info['workers'] = len(self._threads)
+        info['wait'] = self.wait_latency.info()
+        info['run'] = self.run_latency.info()
+        info['by_status'] = DAL.count_jobs_by_status()
+        return info
+
+
+def _eager(app):
+    eager = app.config['JOBS_EAGER']
+    return app.testing if eager is None else eager
+
+
+def enqueue(kind, payload):
+    """Queue a job on the current app's job queue."""
+    app = current_app._get_current_object()
+    eager = _eager(app)
+    job_queue = app.extensions['jobs']
+    if not eager:
+        job_queue.start()
+    return job_queue.enqueue(kind, payload, eager=eager)
+
+
+def init_app(app):
+    app.config.setdefault('JOBS_WORKERS', 2)
+    app.config.setdefault('JOBS_MAX_QUEUE', 100)
+    app.config.setdefault('JOBS_MAX_ATTEMPTS', 3)
+    app.config.setdefault('JOBS_RETRY_DELAY', 1.0)
+    app.config.setdefault('JOBS_STALE_AFTER', 300)
+    app.config.setdefault('JOBS_POLL_INTERVAL', 2.0)
+    app.config.setdefault('JOBS_KEEP_DONE', 3600)
+    app.config.setdefault('JOBS_EAGER', None)
+    app.extensions['jobs'] = JobQueue(
+        workers=app.config['JOBS_WORKERS'],
+        max_queue=app.config['JOBS_MAX_QUEUE'],
+        max_attempts=app.config['JOBS_MAX_ATTEMPTS'],
+        retry_delay=app.config['JOBS_RETRY_DELAY'],
+        stale_after=app.config['JOBS_STALE_AFTER'],
+        poll_interval=app.config['JOBS_POLL_INTERVAL'],
+        app=app,
+        keep_done=app.config['JOBS_KEEP_DONE'],
+    )
+
+    @app.before_request
+    def start_workers():
+        # Started on the first request rather than at import, so importing the
+        # app (tests, CLI scripts, forking servers) doesn't spawn threads.
+        if not _eager(app):
+            app.extensions['jobs'].start()
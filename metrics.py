@@ -0,0 +1,226 @@
+"""
+Request and SQL metrics in Prometheus text format.
+
+Every request's duration goes into a fixed-bucket histogram per endpoint
+and method, and every SQL statement run through DAL.get_connection() is
+timed into a histogram per statement type. Statements run while handling
+a request are also added to that endpoint's SQL count and time, which is
+what finds N+1 query patterns.
+
+The DAL statement observer is installed once, when this module is
+imported, and records into the metrics of whichever app's context the
+statement runs in (requests, and job workers, which run in their app's
+context). Several apps in one process therefore keep separate numbers.
+Statements run outside any app context, such as the DAL writer thread's
+batch inserts or CLI scripts, are not recorded.
+
+GET /metrics serves all of it, along with the job queue, page cache,
+connection pool and project cache counters. Recording costs a bisect and
+a lock per observation. Set METRICS_ENABLED = False to turn it off.
+
+Request durations are measured to after_request, so for streamed pages
+they cover the view and the first template chunk, not the whole body.
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, has_app_context, request
+
+import DAL
+from page_cache import no_page_cache
+
+# Upper bounds in seconds; +Inf is implicit.
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.snapshot().items()):
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.label_names + ("le",), labels + (le,))} {cumulative}')
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}" for labels, value in values)
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def _gauges(name, help_text, values, kind='gauge'):
+    """Render a flat dict of numbers as one metric family labelled by key."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for key, value in sorted(values.items()):
+        if isinstance(value, (int, float)):
+            lines.append(f'{name}{{name="{_escape(key)}"}} {_number(value)}')
+    return lines
+
+
+class Metrics:
+    """All metric families for one app, plus the per-thread SQL tally of the current request."""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Time to handle a request.',
+            ('endpoint', 'method'), REQUEST_BUCKETS)
+        self.requests = Counter(
+            'http_requests_total', 'Requests handled, by status code.',
+            ('endpoint', 'method', 'status'))
+        self.sql_duration = Histogram(
+            'sql_statement_duration_seconds', 'Time to execute one SQL statement.',
+            ('operation',), SQL_BUCKETS)
+        self.request_sql_statements = Counter(
+            'http_request_sql_statements_total', 'SQL statements executed while handling requests.',
+            ('endpoint',))
+        self.request_sql_seconds = Counter(
+            'http_request_sql_seconds_total', 'Time spent in SQL while handling requests.',
+            ('endpoint',))
+        self._local = threading.local()
+
+    def start_request(self):
+        self._local.tally = [time.perf_counter(), 0, 0.0]
+
+    def finish_request(self, endpoint, method, status):
+        tally = getattr(self._local, 'tally', None)
+        if tally is None:
+            return
+        self._local.tally = None
+        started, statements, sql_seconds = tally
+        self.request_duration.observe((endpoint, method), time.perf_counter() - started)
+        self.requests.inc((endpoint, method, str(status)))
+        if statements:
+            self.request_sql_statements.inc((endpoint,), statements)
+            self.request_sql_seconds.inc((endpoint,), sql_seconds)
+
+    def observe_statement(self, sql, seconds):
+        operation = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'EMPTY'
+        self.sql_duration.observe((operation,), seconds)
+        tally = getattr(self._local, 'tally', None)
+        if tally is not None:
+            tally[1] += 1
+            tally[2] += seconds
+
+    def render(self, app):
+        lines = []
+        for family in (self.request_duration, self.requests, self.sql_duration,
+                       self.request_sql_statements, self.request_sql_seconds):
+            lines.extend(family.render())
+        if 'jobs' in app.extensions:
+            job_info = app.extensions['jobs'].info()
+            lines.extend(_gauges('jobs_queue', 'Background job queue depth, counters and latency (ms).', {
+                'depth': job_info['depth'],
+                'in_flight': job_info['in_flight'],
+                'workers': job_info['workers'],
+                **{key: job_info[key] for key in ('enqueued', 'completed', 'retried', 'failed', 'overflowed')},
+                **{f"wait_{key}": value for key, value in job_info['wait'].items()},
+                **{f"run_{key}": value for key, value in job_info['run'].items()},
+            }))
+            lines.extend(_gauges('jobs_by_status', 'Persisted jobs by status.', job_info['by_status']))
+        if 'page_cache' in app.extensions:
+            lines.extend(_gauges('page_cache', 'Rendered page cache counters.', app.extensions['page_cache'].info()))
+        lines.extend(_gauges('db_pool', 'SQLite connection pool counters.', DAL.get_pool_stats()))
+        lines.extend(_gauges('project_cache', 'Project row cache counters.', DAL.get_cache_stats()))
+        lines.extend(_gauges('db_writer', 'Group-commit writer counters.', DAL.get_writer_stats()))
+        return '\n'.join(lines) + '\n'
+
+
+def _observe_statement(sql, seconds):
+    if not has_app_context():
+        return
+    metrics = current_app.extensions.get('metrics')
+    if metrics is not None and current_app.config['METRICS_ENABLED']:
+        metrics.observe_statement(sql, seconds)
+
+
+DAL.set_statement_observer(_observe_statement)
+
+
+def init_app(app):
+    """Register request timing and /metrics; call before page_cache.init_app so cache hits are timed."""
+    app.config.setdefault('METRICS_ENABLED', True)
+    metrics = Metrics()
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def start_timer():
+        if app.config['METRICS_ENABLED']:
+            metrics.start_request()
+
+    @app.after_request
+    def record_request(response):
+        metrics.finish_request(request.endpoint or 'unmatched', request.method, response.status_code)
+        return response
+
+    @no_page_cache
+    def metrics_view():
+        if not app.config['METRICS_ENABLED']:
+            return app.response_class('Metrics are disabled\n', status=404, content_type='text/plain')
+        return app.response_class(metrics.render(app), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations.
+
+Each step is a function registered with @migration(version, name) that
+runs inside one BEGIN IMMEDIATE transaction together with the row it adds
+to schema_version. migrate() applies whatever is pending while holding an
+exclusive lock on <db>.migrate.lock, so when several workers start at once
+one of them migrates and the rest wait and then find nothing to do.
+
+Starting a worker against an up-to-date database costs a single SELECT.
+Steps 1-6 use IF NOT EXISTS, so databases created before this module
+existed are adopted as they are.
+
+    python migrations.py status [--db projects.db]
+    python migrations.py migrate [--db projects.db]
+"""
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BUSY_TIMEOUT = 30.0
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """Register fn(conn) as schema step `version`; versions must be registered in order."""
+    def decorator(fn):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"migration {version} registered after {MIGRATIONS[-1][0]}")
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return decorator
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def run_script(conn, script):
+    """Execute a multi-statement script statement by statement.
+
+    Unlike Connection.executescript this doesn't commit first, so the
+    script stays inside the migration's transaction.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ''
+    if statement.strip():
+        conn.execute(statement)
+
+
+@migration(1, 'projects table')
+def _create_projects(conn):
+    run_script(conn, """
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            slug TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            image_file_name TEXT NOT NULL
+        );
+    """)
+
+
+@migration(2, 'data generation counter')
+def _create_data_generation(conn):
+    run_script(conn, """
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 0);
+        CREATE TRIGGER IF NOT EXISTS projects_generation_insert AFTER INSERT ON projects BEGIN
+            UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS projects_generation_update AFTER UPDATE ON projects BEGIN
+            UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS projects_generation_delete AFTER DELETE ON projects BEGIN
+            UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+    """)
+
+
+@migration(3, 'slug counters')
+def _create_slug_counters(conn):
+    run_script(conn, """
+        CREATE TABLE IF NOT EXISTS slug_counters (
+            base TEXT PRIMARY KEY,
+            last_suffix INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """)
+
+
+@migration(4, 'image variants')
+def _create_image_variants(conn):
+    run_script(conn, """
+        CREATE TABLE IF NOT EXISTS image_variants (
+            image_file_name TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            mime_type TEXT NOT NULL,
+            PRIMARY KEY (image_file_name, file_name)
+        ) WITHOUT ROWID;
+    """)
+
+
+@migration(5, 'full-text search index')
+def _create_search_index(conn):
+    """FTS5 index over projects, kept in sync by triggers and backfilled once."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+    ).fetchone()
+    if exists:
+        return
+    try:
+        conn.execute("SAVEPOINT search_index")
+        run_script(conn, """
+            CREATE VIRTUAL TABLE projects_fts USING fts5(
+                title, description,
+                content='projects', content_rowid='id',
+                tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN
+                INSERT INTO projects_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN
+                INSERT INTO projects_fts (projects_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF title, description ON projects BEGIN
+                INSERT INTO projects_fts (projects_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO projects_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+            END;
+            INSERT INTO projects_fts (projects_fts) VALUES ('rebuild');
+        """)
+        conn.execute("RELEASE search_index")
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; search_projects() falls back to LIKE.
+        conn.execute("ROLLBACK TO search_index")
+        conn.execute("RELEASE search_index")
+
+
+@migration(6, 'jobs table')
+def _create_jobs(conn):
+    run_script(conn, """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+    """)
+
+
+@migration(7, 'tags and facet counts')
+def _create_tags(conn):
+    """tags.project_count is the facet count, kept current by triggers on project_tags."""
+    run_script(conn, """
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL,
+            project_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS tags_by_count ON tags (project_count DESC, name);
+        CREATE TABLE IF NOT EXISTS project_tags (
+            tag_id INTEGER NOT NULL,
+            project_id INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, project_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS project_tags_by_project ON project_tags (project_id, tag_id);
+        CREATE TRIGGER IF NOT EXISTS project_tags_count_insert AFTER INSERT ON project_tags BEGIN
+            UPDATE tags SET project_count = project_count + 1 WHERE id = new.tag_id;
+            UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS project_tags_count_delete AFTER DELETE ON project_tags BEGIN
+            UPDATE tags SET project_count = project_count - 1 WHERE id = old.tag_id;
+            UPDATE data_generation SET generation = generation + 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS projects_tags_delete AFTER DELETE ON projects BEGIN
+            DELETE FROM project_tags WHERE project_id = old.id;
+        END;
+    """)
+
+
+@migration(8, 'project image metadata')
+def _add_image_metadata(conn):
+    """Intrinsic size and placeholder colour of each project's image (see imagemeta.py)."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(projects)")}
+    for name, kind in (('image_width', 'INTEGER'), ('image_height', 'INTEGER'), ('image_color', 'TEXT')):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE projects ADD COLUMN {name} {kind}")
+    conn.execute("CREATE INDEX IF NOT EXISTS projects_image ON projects (image_file_name)")
+
+
+@migration(9, 'job retry schedule')
+def _add_job_run_after(conn):
+    """jobs.run_after: a retried job is not claimed before this time (see DAL.fail_job)."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+    if 'run_after' not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL NOT NULL DEFAULT 0")
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+    return conn
+
+
+def current_version(conn):
+    try:
+        return conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0  # no schema_version table yet
+
+
+@contextlib.contextmanager
+def _file_lock(db_path):
+    """Exclusive lock on <db>.migrate.lock, shared by every process using the database."""
+    lock_path = Path(f"{db_path}.migrate.lock")
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _apply_pending(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at REAL NOT NULL)"
+    )
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version <= current_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
+
+
+def migrate(db_path):
+    """Bring the database up to the latest version; returns the versions applied."""
+    conn = _connect(db_path)
+    try:
+        if current_version(conn) >= latest_version():
+            return []
+        with _file_lock(db_path):
+            # Another process may have finished while we waited for the lock
+            return _apply_pending(conn)
+    finally:
+        conn.close()
+
+
+def status(db_path):
+    """(current version, [(version, name) still pending])"""
+    if not os.path.exists(db_path):
+        return 0, [(v, n) for v, n, _ in MIGRATIONS]
+    conn = _connect(db_path)
+    try:
+        version = current_version(conn)
+    finally:
+        conn.close()
+    return version, [(v, n) for v, n, _ in MIGRATIONS if v > version]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Database schema migrations')
+    parser.add_argument('command', choices=['status', 'migrate'])
+    parser.add_argument('--db', default='projects.db', help='SQLite database path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        applied = migrate(args.db)
+        print(f"Applied migrations {applied}" if applied else 'Already up to date')
+    version, pending = status(args.db)
+    print(f"Schema version {version} of {latest_version()}")
+    for number, name in pending:
+        print(f"  pending: {number} {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
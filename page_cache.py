@@ -0,0 +1,158 @@
+"""
+Rendered-page output cache.
+
+GET responses are cached as rendered bytes keyed on endpoint, view args,
+query string and DAL.get_data_version(), so any change to the projects
+table retires every entry at once. Each entry carries a precomputed ETag
+and Last-Modified, and conditional requests are answered with 304 before
+the view runs. Entries are evicted least-recently-used once their total
+size passes PAGE_CACHE_MAX_BYTES.
+
+Only buffered 200 text/html responses that don't set cookies are stored.
+Decorate a view with @no_page_cache to opt it out.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, request
+from werkzeug.http import http_date
+
+import DAL
+
+
+def no_page_cache(view):
+    """Never serve this view from, or store it in, the page cache."""
+    view.no_page_cache = True
+    return view
+
+
+class PageCache:
+    """Byte-bounded LRU of rendered pages."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'stores': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, key, body, content_type):
+        entry = {
+            'body': body,
+            'content_type': content_type,
+            'etag': hashlib.blake2b(body, digest_size=16).hexdigest(),
+            'last_modified': http_date(time.time()),
+        }
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old['body'])
+            self._entries[key] = entry
+            self._size += len(body)
+            self.stats['stores'] += 1
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted['body'])
+                self.stats['evictions'] += 1
+        return entry
+
+    def count_not_modified(self):
+        with self._lock:
+            self.stats['not_modified'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._size)
+
+
+def _cacheable_view(app):
+    if request.method not in ('GET', 'HEAD') or not app.config['PAGE_CACHE_ENABLED']:
+        return False
+    view = app.view_functions.get(request.endpoint)
+    return view is not None and request.endpoint != 'static' and not getattr(view, 'no_page_cache', False)
+
+
+def _apply_validators(response, entry):
+    response.set_etag(entry['etag'])
+    response.headers['Last-Modified'] = entry['last_modified']
+    response.cache_control.no_cache = True
+
+
+# compression.py sends an encoded body with '<etag>-<encoding>', so a client
+# holding the compressed page revalidates with that tag rather than ours.
+ENCODED_ETAG_SUFFIXES = ('-gzip', '-br')
+
+
+def _make_conditional(response, entry):
+    """response.make_conditional(), also matching the ETags of compressed variants."""
+    for suffix in ENCODED_ETAG_SUFFIXES:
+        if request.if_none_match.contains_weak(entry['etag'] + suffix):
+            response.set_etag(entry['etag'] + suffix)
+            response.vary.add('Accept-Encoding')
+            break
+    return response.make_conditional(request)
+
+
+def init_app(app):
+    app.config.setdefault('PAGE_CACHE_ENABLED', True)
+    app.config.setdefault('PAGE_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+    cache = PageCache(app.config['PAGE_CACHE_MAX_BYTES'])
+    app.extensions['page_cache'] = cache
+
+    @app.before_request
+    def serve_cached_page():
+        if not _cacheable_view(app):
+            return None
+        key = (
+            request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            tuple(sorted(request.args.items(multi=True))),
+            str(DAL.DB_PATH),
+            DAL.get_data_version(),
+        )
+        entry = cache.get(key)
+        if entry is None:
+            g.page_cache_key = key
+            return None
+        response = app.response_class(entry['body'], content_type=entry['content_type'])
+        _apply_validators(response, entry)
+        _make_conditional(response, entry)
+        if response.status_code == 304:
+            cache.count_not_modified()
+        return response
+
+    @app.after_request
+    def store_page(response):
+        key = g.pop('page_cache_key', None)
+        if (
+            key is None
+            or response.status_code != 200
+            or response.mimetype != 'text/html'
+            or response.is_streamed
+            or response.direct_passthrough
+            or 'Set-Cookie' in response.headers
+        ):
+            return response
+        entry = cache.put(key, response.get_data(), response.content_type)
+        _apply_validators(response, entry)
+        return _make_conditional(response, entry)
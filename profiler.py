@@ -0,0 +1,285 @@
+"""
+Opt-in per-request profiling.
+
+With PROFILER_ENABLED on, a request is captured when
+
+- it is picked by sampling (PROFILER_SAMPLE_RATE, 0.0 - 1.0),
+- it carries the PROFILER_HEADER header set to PROFILER_TOKEN (in debug
+  mode without a token, any value will do), or
+- it takes longer than PROFILER_SLOW_MS.
+
+Sampled and header requests run under cProfile and produce a .prof file
+(open with `python -m pstats` or snakeviz). Every capture also gets a
+.folded file of collapsed stacks from a background sampler that looks at
+the request's thread every PROFILER_INTERVAL seconds; feed it to
+flamegraph.pl or speedscope. Since the sampler is cheap, every request is
+watched when a slow threshold is set, and only the slow ones are kept.
+
+Captures go to PROFILER_DIR, keeping the newest PROFILER_KEEP. /_profiler
+lists them by endpoint and duration; it takes the same token, as the
+header or ?token=.
+Like metrics.py, timing runs from before_request to after_request.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from flask import abort, render_template, request, send_from_directory
+
+from page_cache import no_page_cache
+
+META_SUFFIX = '.json'
+# The profiler's own pages are never profiled
+PROFILER_ENDPOINTS = {'profiler_index', 'profiler_file'}
+
+
+def _frame_label(code):
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def collapse(frame):
+    """Semicolon-joined stack from the outermost frame down to `frame`."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Background thread sampling the stacks of registered threads.
+
+    The thread sleeps while nothing is registered, so it costs nothing
+    between requests.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def watch(self):
+        """Start sampling the calling thread; returns the Counter its stacks go into."""
+        samples = Counter()
+        with self._lock:
+            self._watched[threading.get_ident()] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return samples
+
+    def unwatch(self):
+        with self._lock:
+            self._watched.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                watched = dict(self._watched)
+            if not watched:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for ident, samples in watched.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[collapse(frame)] += 1
+            time.sleep(self.interval)
+
+
+_rotate_lock = threading.Lock()
+
+
+class CaptureStore:
+    """Directory of captures: <id>.prof, <id>.folded and <id>.json metadata."""
+
+    def __init__(self, directory, keep):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, meta, profile=None, samples=None):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        capture_id = f"{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{threading.get_ident() % 100000}"
+        files = []
+        if profile is not None:
+            profile.dump_stats(self.directory / f"{capture_id}.prof")
+            files.append(f"{capture_id}.prof")
+        if samples:
+            lines = (f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+            (self.directory / f"{capture_id}.folded").write_text(''.join(lines))
+            files.append(f"{capture_id}.folded")
+        meta = dict(meta, id=capture_id, files=files)
+        (self.directory / f"{capture_id}{META_SUFFIX}").write_text(json.dumps(meta))
+        self._rotate()
+        return meta
+
+    def captures(self):
+        """Metadata of stored captures, newest first."""
+        if not self.directory.is_dir():
+            return []
+        captures = []
+        for path in self.directory.glob(f"*{META_SUFFIX}"):
+            try:
+                captures.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # being rotated away or half-written by another process
+        return sorted(captures, key=lambda c: c['created'], reverse=True)
+
+    def _rotate(self):
+        with _rotate_lock:
+            metas = sorted(self.directory.glob(f"*{META_SUFFIX}"), key=lambda p: p.name)
+            for path in metas[:max(0, len(metas) - self.keep)]:
+                capture_id = path.name[:-len(META_SUFFIX)]
+                for stale in self.directory.glob(f"{capture_id}.*"):
+                    try:
+                        stale.unlink()
+                    except FileNotFoundError:
+                        pass
+
+
+class RequestProfile:
+    """Profiling state for one in-flight request."""
+
+    __slots__ = ('reason', 'profile', 'samples', 'started')
+
+    def __init__(self, reason, profile, samples):
+        self.reason = reason
+        self.profile = profile
+        self.samples = samples
+        self.started = time.perf_counter()
+
+
+class Profiler:
+    def __init__(self, app):
+        self.app = app
+        self.sampler = StackSampler(app.config['PROFILER_INTERVAL'])
+        self._local = threading.local()
+
+    @property
+    def store(self):
+        return CaptureStore(self.app.config['PROFILER_DIR'], self.app.config['PROFILER_KEEP'])
+
+    def _reason(self):
+        config = self.app.config
+        if _trusted(self.app, request.headers.get(config['PROFILER_HEADER'])):
+            return 'header'
+        rate = config['PROFILER_SAMPLE_RATE']
+        if rate and random.random() < rate:
+            return 'sampled'
+        if config['PROFILER_SLOW_MS'] is not None:
+            return 'slow'
+        return None
+
+    def start(self):
+        if not self.app.config['PROFILER_ENABLED'] or request.endpoint in PROFILER_ENDPOINTS:
+            return
+        reason = self._reason()
+        if reason is None:
+            return
+        profile = None
+        if reason != 'slow':
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                profile = None  # another profiler is active in this interpreter
+        self._local.current = RequestProfile(reason, profile, self.sampler.watch())
+
+    def finish(self, response):
+        current = getattr(self._local, 'current', None)
+        if current is None:
+            return
+        self._local.current = None
+        if current.profile is not None:
+            current.profile.disable()
+        self.sampler.unwatch()
+        duration_ms = (time.perf_counter() - current.started) * 1000
+        slow_ms = self.app.config['PROFILER_SLOW_MS']
+        if current.reason == 'slow' and duration_ms < slow_ms:
+            return
+        if slow_ms is not None and duration_ms >= slow_ms:
+            current.reason = 'slow' if current.reason == 'slow' else f"{current.reason}+slow"
+        self.store.save({
+            'endpoint': request.endpoint or 'unmatched',
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'reason': current.reason,
+            'created': time.time(),
+        }, profile=current.profile, samples=current.samples)
+
+
+def _trusted(app, value):
+    token = app.config['PROFILER_TOKEN']
+    if not value:
+        return False
+    if token is None:
+        return app.debug
+    # Header values may hold non-ASCII text, which compare_digest rejects as str.
+    return hmac.compare_digest(value.encode(), str(token).encode())
+
+
+def _check_access(app):
+    if not app.config['PROFILER_ENABLED']:
+        abort(404)
+    supplied = request.args.get('token') or request.headers.get(app.config['PROFILER_HEADER'])
+    if not (_trusted(app, supplied) or (app.debug and app.config['PROFILER_TOKEN'] is None)):
+        abort(403)
+
+
+def init_app(app):
+    app.config.setdefault('PROFILER_ENABLED', False)
+    app.config.setdefault('PROFILER_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILER_HEADER', 'X-Profile')
+    app.config.setdefault('PROFILER_TOKEN', None)
+    app.config.setdefault('PROFILER_SLOW_MS', None)
+    app.config.setdefault('PROFILER_INTERVAL', 0.005)
+    app.config.setdefault('PROFILER_DIR', 'profiles')
+    app.config.setdefault('PROFILER_KEEP', 200)
+    profiler = Profiler(app)
+    app.extensions['profiler'] = profiler
+
+    @app.before_request
+    def start_profile():
+        profiler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        profiler.finish(response)
+        return response
+
+    @no_page_cache
+    def profiler_index():
+        _check_access(app)
+        captures = profiler.store.captures()
+        if request.args.get('sort') == 'duration':
+            captures.sort(key=lambda c: c['duration_ms'], reverse=True)
+        endpoint = request.args.get('view')
+        if endpoint:
+            captures = [c for c in captures if c['endpoint'] == endpoint]
+        for capture in captures:
+            capture['when'] = datetime.fromtimestamp(capture['created']).strftime('%Y-%m-%d %H:%M:%S')
+        return render_template('profiler.html', captures=captures, endpoint=endpoint,
+                               token=request.args.get('token'))
+
+    @no_page_cache
+    def profiler_file(filename):
+        _check_access(app)
+        return send_from_directory(Path(app.config['PROFILER_DIR']).resolve(), filename, as_attachment=True)
+
+    app.add_url_rule('/_profiler', 'profiler_index', profiler_index)
+    app.add_url_rule('/_profiler/<path:filename>', 'profiler_file', profiler_file)
@@ -4,10 +4,13 @@ Test runner script for the personal website Flask application.
 This script provides easy commands to run different types of tests.
 """
 
+import os
 import sys
 import subprocess
 import argparse
 
+BENCH_BASELINE = 'benchmarks/baseline.json'
+
 
 def run_command(cmd, description):
     """Run a command and handle errors."""
@@ -27,12 +30,14 @@ def run_command(cmd, description):
 
 def main():
     parser = argparse.ArgumentParser(description='Test runner for personal website')
-    parser.add_argument('--type', choices=['all', 'db', 'flask', 'coverage'], 
+    parser.add_argument('--type', choices=['all', 'db', 'flask', 'coverage', 'bench'], 
                        default='all', help='Type of tests to run')
     parser.add_argument('--verbose', '-v', action='store_true', 
                        help='Run tests in verbose mode')
     parser.add_argument('--no-warnings', action='store_true', 
                        help='Suppress warnings')
+    parser.add_argument('--large', action='store_true',
+                       help='With --type bench, also benchmark a 1M-row database')
     
     args = parser.parse_args()
     
@@ -66,6 +71,17 @@ def main():
         # Run tests with coverage
         cmd = base_cmd + ['--cov=.', '--cov-report=html', '--cov-report=term']
         success = run_command(cmd, "Tests with Coverage Report")
+
+    elif args.type == 'bench':
+        # HTTP load benchmark, compared against the stored baseline
+        if not os.path.exists(BENCH_BASELINE):
+            print(f"\n[FAILED] {BENCH_BASELINE} not found; record one on this machine with:")
+            print("    python benchmarks/bench_http.py --save-baseline")
+            sys.exit(1)
+        cmd = ['python', 'benchmarks/bench_http.py', '--baseline', BENCH_BASELINE]
+        if args.large:
+            cmd.append('--large')
+        success = run_command(cmd, "HTTP Benchmarks")
     
     if success:
         print(f"\n[SUCCESS] All tests completed successfully!")
@@ -0,0 +1,53 @@
+"""
+Content-addressed storage for uploaded images.
+
+Uploads are streamed to a temporary file while being hashed and then moved
+to uploads/<aa>/<bb>/<sha256><ext> under the images directory, where aa/bb
+are the first two byte pairs of the digest. Identical uploads map to the
+same file, names never change once written (so they can be cached
+forever), and no directory grows past 256 entries per level.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+IMAGES_DIR = Path('static/images')
+UPLOADS_DIR = 'uploads'
+CHUNK_SIZE = 64 * 1024
+
+
+def content_path(digest, extension):
+    """Path of a stored file relative to the images directory, e.g. uploads/ab/cd/abcd...jpg."""
+    return f"{UPLOADS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def store_upload(stream, extension, images_dir=IMAGES_DIR):
+    """Store a file-like object by content hash.
+
+    Returns (image_file_name, created) where image_file_name is relative to
+    images_dir and created is False when identical content was already
+    stored. The file is written next to its destination and renamed into
+    place, so readers never see a partial file.
+    """
+    extension = extension.lower()
+    uploads = Path(images_dir) / UPLOADS_DIR
+    uploads.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, temp_name = tempfile.mkstemp(dir=uploads, prefix='.upload-', suffix=extension)
+    try:
+        with os.fdopen(fd, 'wb') as temp:
+            while chunk := stream.read(CHUNK_SIZE):
+                digest.update(chunk)
+                temp.write(chunk)
+        image_file_name = content_path(digest.hexdigest(), extension)
+        destination = Path(images_dir) / image_file_name
+        if destination.exists():
+            return image_file_name, False
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_name, destination)
+        return image_file_name, True
+    finally:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
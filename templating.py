@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Compiled-template caching.
+
+Jinja compiles each template to Python the first time it is loaded, which
+makes the first hit on every page in a new worker several times slower
+than the rest. init_app(app) gives the app's Jinja environment a
+FileSystemBytecodeCache in TEMPLATE_CACHE_DIR, shared by every worker on
+the host. Jinja stores a checksum of the source with each entry, so an
+edited template is simply recompiled.
+
+With TEMPLATE_PRELOAD every template is loaded while the app is built,
+so no request pays for compiling. `python templating.py compile` fills
+the cache ahead of time (the Dockerfile runs it at build time).
+"""
+
+import os
+import sys
+import time
+
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+DEFAULT_CACHE_DIR = '.jinja_cache'
+
+
+def preload(app):
+    """Load (compiling or reading bytecode for) every template; returns (loaded, seconds)."""
+    started = time.perf_counter()
+    env = app.jinja_env
+    loaded = 0
+    for name in env.list_templates(extensions=('html', 'htm', 'xml', 'txt')):
+        try:
+            env.get_template(name)
+        except TemplateSyntaxError as e:
+            app.logger.error("Template %s does not compile: %s", name, e)
+            continue
+        loaded += 1
+    return loaded, time.perf_counter() - started
+
+
+def init_app(app):
+    app.config.setdefault('TEMPLATE_BYTECODE_CACHE', True)
+    app.config.setdefault('TEMPLATE_CACHE_DIR', DEFAULT_CACHE_DIR)
+    app.config.setdefault('TEMPLATE_PRELOAD', False)
+    if app.config['TEMPLATE_BYTECODE_CACHE']:
+        directory = os.path.join(app.root_path, app.config['TEMPLATE_CACHE_DIR'])
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            app.logger.warning("Template bytecode cache disabled, %s is not writable: %s", directory, e)
+        else:
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    if app.config['TEMPLATE_PRELOAD']:
+        preload(app)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] != ['compile']:
+        print('usage: python templating.py compile')
+        return 2
+    from app import create_app
+    app = create_app({'TEMPLATE_BYTECODE_CACHE': True})
+    loaded, seconds = preload(app)
+    print(f"Compiled {loaded} templates into {app.jinja_env.bytecode_cache.directory} in {seconds * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
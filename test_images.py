@@ -0,0 +1,197 @@
+import hashlib
+import io
+import pytest
+
+import DAL
+import imagemeta
+import images
+import storage
+from DAL import seed_projects, insert_project, get_image_variants
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+class TestImagePipeline:
+    """Test the responsive image derivative pipeline."""
+
+    @pytest.fixture
+    def images_dir(self, tmp_path):
+        """A scratch images directory with a wide JPEG and a small PNG."""
+        PIL.new('RGB', (800, 400), (200, 40, 40)).save(tmp_path / 'wide.jpg', 'JPEG')
+        PIL.new('RGBA', (120, 120), (0, 0, 255, 128)).save(tmp_path / 'small.png', 'PNG')
+        (tmp_path / 'broken.jpg').write_bytes(b'fake image data')
+        return tmp_path
+
+    def test_generate_variants_bounded_widths(self, images_dir):
+        """Test that derivatives are produced for widths narrower than the original."""
+        variants = images.generate_variants('wide.jpg', images_dir=images_dir)
+
+        assert variants[0] == {'file_name': 'wide.jpg', 'width': 800, 'height': 400, 'mime_type': 'image/jpeg'}
+        assert [(v['width'], v['mime_type']) for v in variants[1:]] == [
+            (160, 'image/jpeg'), (160, 'image/webp'),
+            (320, 'image/jpeg'), (320, 'image/webp'),
+            (640, 'image/jpeg'), (640, 'image/webp'),
+        ]
+        for variant in variants[1:]:
+            with PIL.open(images_dir / variant['file_name']) as im:
+                assert im.size == (variant['width'], variant['height'])
+        assert (images_dir / 'derived' / 'wide-320w.webp').exists()
+
+    def test_generate_variants_small_image(self, images_dir):
+        """Test that images narrower than every target only record the original."""
+        variants = images.generate_variants('small.png', images_dir=images_dir)
+        assert variants == [{'file_name': 'small.png', 'width': 120, 'height': 120, 'mime_type': 'image/png'}]
+
+    def test_process_image_records_variants(self, temp_db, images_dir):
+        """Test that processed images are recorded and unreadable ones are skipped."""
+        assert images.process_image('broken.jpg', images_dir=images_dir) == []
+        recorded = images.process_image('wide.jpg', images_dir=images_dir)
+
+        stored = get_image_variants(['wide.jpg', 'broken.jpg'])
+        assert list(stored) == ['wide.jpg']
+        assert len(stored['wide.jpg']) == len(recorded) == 7
+        assert stored['wide.jpg'][0]['width'] == 160
+
+    def test_backfill_skips_current_images(self, temp_db, images_dir):
+        """Test that a second backfill leaves up-to-date derivatives alone."""
+        assert images.backfill(images_dir) == (2, 0, 1)
+        assert images.backfill(images_dir) == (0, 2, 1)
+        assert images.backfill(images_dir, force=True) == (2, 0, 1)
+
+    def test_projects_listing_emits_srcset(self, temp_db, images_dir):
+        """Test that the listing uses recorded variants for srcset/sizes."""
+        from app import app
+        seed_projects()
+        insert_project('Wide Image', 'Has derivatives', 'wide.jpg')
+        images.process_image('wide.jpg', images_dir=images_dir)
+
+        with app.test_client() as client:
+            response = client.get('/projects')
+
+        assert b'<source type="image/webp" srcset="/static/images/derived/wide-160w.webp 160w' in response.data
+        assert b'/static/images/derived/wide-640w.jpg 640w, /static/images/wide.jpg 800w" sizes="180px"' in response.data
+        # rows without derivatives keep the plain image tag
+        assert response.data.count(b'<picture>') == 1
+
+
+class TestImageMetadata:
+    """Test header-only dimension probing and placeholder colours."""
+
+    def test_probe_formats(self, tmp_path):
+        """Test that sizes read from headers match what Pillow decodes."""
+        samples = {
+            'a.png': ('RGBA', 'PNG', {}),
+            'a.gif': ('P', 'GIF', {}),
+            'a.jpg': ('RGB', 'JPEG', {'progressive': True}),
+            'lossy.webp': ('RGB', 'WEBP', {}),
+            'lossless.webp': ('RGB', 'WEBP', {'lossless': True}),
+            'alpha.webp': ('RGBA', 'WEBP', {}),  # VP8X container
+        }
+        for name, (mode, fmt, options) in samples.items():
+            PIL.new(mode, (321, 123)).save(tmp_path / name, fmt, **options)
+            meta = imagemeta.probe(tmp_path / name)
+            assert (meta['width'], meta['height']) == (321, 123), name
+            assert meta['mime_type'] == images.MIME_TYPES[fmt]
+
+        (tmp_path / 'broken.jpg').write_bytes(b'\xff\xd8\xff\xe0 truncated')
+        assert imagemeta.probe(tmp_path / 'broken.jpg') is None
+        assert imagemeta.probe(tmp_path / 'missing.png') is None
+
+    def test_probe_jpeg_exif_orientation(self, tmp_path):
+        """Test that a JPEG rotated by its EXIF orientation reports its displayed size."""
+        exif = PIL.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise
+        PIL.new('RGB', (400, 100)).save(tmp_path / 'rotated.jpg', 'JPEG', exif=exif)
+        meta = imagemeta.probe(tmp_path / 'rotated.jpg')
+        assert (meta['width'], meta['height']) == (100, 400)
+
+    def test_placeholder_color_dominant(self, tmp_path):
+        """Test that the placeholder is the most common colour, with transparency over white."""
+        image = PIL.new('RGB', (100, 100), (200, 30, 30))
+        image.paste((20, 20, 200), (0, 0, 30, 100))
+        image.save(tmp_path / 'mostly-red.png')
+        PIL.new('RGBA', (10, 10), (0, 0, 0, 0)).save(tmp_path / 'clear.png')
+
+        assert imagemeta.placeholder_color(tmp_path / 'mostly-red.png') == '#c81e1e'
+        assert imagemeta.placeholder_color(tmp_path / 'clear.png') == '#ffffff'
+
+    def test_backfill_records_metadata(self, temp_db, tmp_path):
+        """Test that the backfill fills every project using an image, once."""
+        PIL.new('RGB', (640, 480), (10, 120, 10)).save(tmp_path / 'green.png')
+        insert_project('One', 'd', 'green.png')
+        insert_project('Two', 'd', 'green.png')
+        insert_project('Missing', 'd', 'missing.png')
+
+        assert imagemeta.backfill(tmp_path) == (1, 1)
+        project = DAL.get_project('two')
+        assert (project.image_width, project.image_height, project.image_color) == (640, 480, '#0a780a')
+        assert imagemeta.backfill(tmp_path) == (0, 1)
+        assert imagemeta.backfill(tmp_path, force=True) == (1, 1)
+
+    def test_contact_upload_records_metadata(self, temp_db, tmp_path, monkeypatch):
+        """Test that an upload's size and colour reach the row and the listing's <img>."""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'UPLOAD_FOLDER', tmp_path)
+        monkeypatch.setitem(app_module.app.config, 'JOBS_EAGER', True)
+        upload = io.BytesIO()
+        PIL.new('RGB', (300, 200), (250, 250, 0)).save(upload, 'PNG')
+        upload.seek(0)
+
+        with app_module.app.test_client() as client:
+            client.post('/contact', data={
+                'title': 'Sized Upload',
+                'description': 'Has a size',
+                'image': (upload, 'yellow.png'),
+            })
+            html = client.get('/projects').get_data(as_text=True)
+
+        project = DAL.get_project('sized-upload')
+        assert (project.image_width, project.image_height, project.image_color) == (300, 200, '#fafa00')
+        assert 'width="300" height="200"' in html
+        assert 'background-color: #fafa00;' in html
+
+
+class TestUploadStorage:
+    """Test content-addressed upload storage."""
+
+    def test_store_upload_content_addressed(self, tmp_path):
+        """Test that uploads are stored under their hash in fan-out directories."""
+        data = b'x' * (storage.CHUNK_SIZE * 2 + 10)
+        digest = hashlib.sha256(data).hexdigest()
+
+        name, created = storage.store_upload(io.BytesIO(data), '.JPG', images_dir=tmp_path)
+
+        assert created
+        assert name == f'uploads/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        assert (tmp_path / name).read_bytes() == data
+        assert [p.name for p in (tmp_path / 'uploads').iterdir()] == [digest[:2]]  # no temp files left
+
+    def test_store_upload_deduplicates(self, tmp_path):
+        """Test that identical content is stored once and different content separately."""
+        first, created_first = storage.store_upload(io.BytesIO(b'same image'), '.png', images_dir=tmp_path)
+        second, created_second = storage.store_upload(io.BytesIO(b'same image'), '.png', images_dir=tmp_path)
+        other, _ = storage.store_upload(io.BytesIO(b'other image'), '.png', images_dir=tmp_path)
+
+        assert first == second
+        assert created_first and not created_second
+        assert other != first
+        assert len(list((tmp_path / 'uploads').rglob('*.png'))) == 2
+
+    def test_contact_upload_deduplicated(self, temp_db, tmp_path, monkeypatch):
+        """Test that submitting the same image twice stores it once."""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'UPLOAD_FOLDER', tmp_path)
+        monkeypatch.setitem(app_module.app.config, 'JOBS_EAGER', True)
+        with app_module.app.test_client() as client:
+            for title in ('First Upload', 'Second Upload'):
+                client.post('/contact', data={
+                    'title': title,
+                    'description': 'Same picture',
+                    'image': (io.BytesIO(b'identical bytes'), 'photo.jpg'),
+                })
+        first = DAL.get_project_by_slug('first-upload')['image_file_name']
+        second = DAL.get_project_by_slug('second-upload')['image_file_name']
+
+        assert first == second
+        assert first.startswith('uploads/') and first.endswith('.jpg')
+        assert len(list(tmp_path.rglob('*.jpg'))) == 1
@@ -0,0 +1,190 @@
+import pytest
+import time
+
+import DAL
+import jobs
+from DAL import get_project_by_slug
+
+
+class TestJobQueue:
+    """Test the background job queue against a temporary database."""
+
+    @pytest.fixture
+    def job_queue(self, temp_db):
+        job_queue = jobs.JobQueue(workers=2, max_queue=10, max_attempts=3,
+                                  retry_delay=0.01, stale_after=60, poll_interval=0.05)
+        yield job_queue
+        job_queue.stop(timeout=2)
+
+    @pytest.fixture
+    def calls(self):
+        calls = []
+
+        @jobs.handler('test_record')
+        def record(payload):
+            calls.append(payload)
+
+        @jobs.handler('test_flaky')
+        def flaky(payload):
+            calls.append(payload)
+            if len(calls) < payload['fail_times'] + 1:
+                raise RuntimeError('not yet')
+
+        yield calls
+        jobs.HANDLERS.pop('test_record', None)
+        jobs.HANDLERS.pop('test_flaky', None)
+
+    def _wait_for(self, condition, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_eager_job_runs_inline(self, job_queue, calls):
+        """Test that an eager job has run and is marked done when enqueue returns."""
+        job_id = job_queue.enqueue('test_record', {'n': 1}, eager=True)
+
+        assert calls == [{'n': 1}]
+        job = DAL.get_job(job_id)
+        assert job['status'] == 'done'
+        assert job['attempts'] == 1
+
+    def test_unknown_kind_rejected(self, job_queue):
+        """Test that enqueueing a job without a handler fails up front."""
+        with pytest.raises(ValueError):
+            job_queue.enqueue('no_such_job', {})
+        assert DAL.count_jobs_by_status() == {}
+
+    def test_workers_run_queued_jobs(self, job_queue, calls):
+        """Test that worker threads drain the queue and record latency."""
+        job_queue.start()
+        ids = [job_queue.enqueue('test_record', {'n': n}) for n in range(5)]
+
+        assert self._wait_for(lambda: DAL.count_jobs_by_status().get('done') == 5)
+        assert sorted(c['n'] for c in calls) == list(range(5))
+        info = job_queue.info()
+        assert info['completed'] == 5
+        assert info['run']['count'] == 5
+        assert info['by_status'] == {'done': 5}
+        assert all(DAL.get_job(i)['finished_at'] for i in ids)
+
+    def test_failed_job_is_retried(self, job_queue, calls):
+        """Test that a job failing twice succeeds on its third attempt."""
+        job_queue.start()
+        job_id = job_queue.enqueue('test_flaky', {'fail_times': 2})
+
+        assert self._wait_for(lambda: DAL.get_job(job_id)['status'] == 'done')
+        assert DAL.get_job(job_id)['attempts'] == 3
+        assert job_queue.info()['retried'] == 2
+
+    def test_retries_wait_for_backoff(self, temp_db):
+        """Test that each retry waits out a doubling delay recorded in run_after."""
+        attempts = []
+
+        @jobs.handler('test_timed')
+        def timed(payload):
+            attempts.append(time.time())
+            raise RuntimeError('still failing')
+
+        job_queue = jobs.JobQueue(workers=1, max_queue=10, max_attempts=3,
+                                  retry_delay=0.2, stale_after=60, poll_interval=0.02)
+        job_queue.start()
+        try:
+            job_id = job_queue.enqueue('test_timed', {})
+            assert self._wait_for(lambda: len(attempts) == 1)
+            job = DAL.get_job(job_id)
+            assert job['status'] == 'queued'
+            assert job['run_after'] >= attempts[0] + 0.2
+            assert DAL.claim_job(job_id) is None  # not due yet
+            assert self._wait_for(lambda: DAL.get_job(job_id)['status'] == 'failed')
+        finally:
+            job_queue.stop(timeout=2)
+            jobs.HANDLERS.pop('test_timed', None)
+
+        assert len(attempts) == 3
+        assert attempts[1] - attempts[0] >= 0.2
+        assert attempts[2] - attempts[1] >= 0.4
+
+    def test_job_fails_after_max_attempts(self, job_queue, calls):
+        """Test that a job which keeps failing ends up failed with its error."""
+        job_id = job_queue.enqueue('test_flaky', {'fail_times': 10}, eager=True)
+
+        job = DAL.get_job(job_id)
+        assert job['status'] == 'failed'
+        assert job['attempts'] == 3
+        assert 'RuntimeError: not yet' in job['last_error']
+
+    def test_jobs_survive_restart(self, job_queue, calls):
+        """Test that queued and interrupted jobs are picked up by a fresh queue."""
+        queued = DAL.create_job('test_record', {'n': 'queued'}, 3)
+        interrupted = DAL.create_job('test_record', {'n': 'interrupted'}, 3)
+        DAL.claim_job(interrupted)
+        with DAL.get_connection() as conn:
+            conn.execute("UPDATE jobs SET started_at = started_at - 3600 WHERE id = ?", (interrupted,))
+
+        job_queue.start()
+
+        assert self._wait_for(lambda: DAL.count_jobs_by_status() == {'done': 2})
+        assert sorted(c['n'] for c in calls) == ['interrupted', 'queued']
+        assert DAL.get_job(queued)['attempts'] == 1
+        assert DAL.get_job(interrupted)['attempts'] == 2
+
+    def test_overflow_stays_in_table(self, temp_db, calls):
+        """Test that jobs beyond the queue bound are persisted and run later."""
+        job_queue = jobs.JobQueue(workers=1, max_queue=2, max_attempts=3,
+                                  retry_delay=0.01, stale_after=60, poll_interval=0.05)
+        for n in range(5):
+            job_queue.enqueue('test_record', {'n': n})
+        assert job_queue.info()['overflowed'] == 3
+        assert job_queue.info()['depth'] == 2
+
+        job_queue.start()
+        try:
+            assert self._wait_for(lambda: DAL.count_jobs_by_status() == {'done': 5})
+        finally:
+            job_queue.stop(timeout=2)
+
+    def test_old_done_jobs_pruned(self, temp_db, calls):
+        """Test that polling deletes done jobs past keep_done and keeps failed ones."""
+        old_done = DAL.create_job('test_record', {'n': 'old'}, 3)
+        DAL.claim_job(old_done)
+        DAL.complete_job(old_done)
+        failed = DAL.create_job('test_record', {'n': 'failed'}, 1)
+        DAL.claim_job(failed)
+        DAL.fail_job(failed, 'boom', retry=False)
+        with DAL.get_connection() as conn:
+            conn.execute("UPDATE jobs SET finished_at = finished_at - 7200")
+
+        job_queue = jobs.JobQueue(workers=1, max_queue=10, max_attempts=3, retry_delay=0.01,
+                                  stale_after=60, poll_interval=0.05, keep_done=3600)
+        job_queue.start()
+        try:
+            recent = job_queue.enqueue('test_record', {'n': 'recent'})
+            assert self._wait_for(lambda: DAL.get_job(recent)['status'] == 'done')
+        finally:
+            job_queue.stop(timeout=2)
+
+        assert DAL.get_job(old_done) is None
+        assert DAL.get_job(failed)['status'] == 'failed'
+        assert DAL.count_jobs_by_status() == {'done': 1, 'failed': 1}
+
+    def test_contact_post_creates_project_in_background(self, temp_db):
+        """Test that POST /contact redirects at once and the worker inserts the project."""
+        from app import app
+        original = dict(app.config)
+        app.config.update(TESTING=False, JOBS_EAGER=False)
+        app.extensions['jobs'].stop(timeout=2)
+        try:
+            with app.test_client() as client:
+                response = client.post('/contact', data={
+                    'title': 'Queued Project',
+                    'description': 'Inserted by a worker',
+                })
+            assert response.status_code == 302
+            assert self._wait_for(lambda: get_project_by_slug('queued-project') is not None)
+        finally:
+            app.extensions['jobs'].stop(timeout=2)
+            app.config.clear()
+            app.config.update(original)
@@ -5,7 +5,7 @@ import time
 from pathlib import Path
 from flask import Flask
 from app import app
-from DAL import init_db, seed_projects
+from DAL import init_db, seed_projects, insert_project, PAGE_SIZE as DAL_PAGE_SIZE
 
 
 class TestFlaskRoutes:
@@ -38,6 +38,7 @@ class TestFlaskRoutes:
         try:
             # Force close any remaining connections
             import gc
+            DAL.close_all_connections()
             gc.collect()
             time.sleep(0.1)  # Give Windows time to release file handles
             
@@ -79,6 +80,50 @@ class TestFlaskRoutes:
         assert b'Building A Mind UI' in response.data
         assert b'Career Resource Library' in response.data
     
+    def test_projects_route_is_streamed(self, client):
+        """Test that the projects listing is streamed under a single request context."""
+        from flask.signals import request_tearing_down
+        teardowns = []
+        with request_tearing_down.connected_to(lambda sender, **kw: teardowns.append(kw), app):
+            response = app.test_client().get('/projects')  # this fixture's client defers teardown
+            assert response.is_streamed
+            assert b'IU Mobile User Feedback' in response.data
+        assert len(teardowns) == 1
+
+    def test_projects_route_pagination(self, client):
+        """Test keyset pagination of the projects listing via ?after=<id>."""
+        app.config['PROJECTS_PAGE_SIZE'] = 2
+        try:
+            response = client.get('/projects')
+            assert b'Collecting feedback' in response.data
+            assert b'Migrating nearly 400' not in response.data
+            assert b'rel="next"' in response.data
+            assert b'rel="prev"' not in response.data
+
+            response = client.get('/projects?after=2')
+            assert b'Migrating nearly 400' in response.data
+            assert b'Collecting feedback' not in response.data
+            assert b'href="/projects?before=3"' in response.data
+            assert b'rel="next"' not in response.data
+        finally:
+            app.config['PROJECTS_PAGE_SIZE'] = DAL_PAGE_SIZE
+
+    def test_projects_search(self, client):
+        """Test full-text search on the projects listing via ?q=."""
+        response = client.get('/projects?q=computer+vision')
+        assert response.status_code == 200
+        assert b'Designing a user interface for a <mark>computer</mark> <mark>vision</mark>' in response.data
+        assert b'Collecting feedback' not in response.data
+
+        response = client.get('/projects?q=zzzz')
+        assert b'No projects match' in response.data
+
+    def test_projects_search_escapes_input(self, client):
+        """Test that search terms are escaped when echoed back."""
+        response = client.get('/projects?q=<script>')
+        assert response.status_code == 200
+        assert b'<script>' not in response.data.split(b'<main>')[1].split(b'</main>')[0]
+
     def test_iu_mobile_route(self, client):
         """Test the IU Mobile project page route."""
         response = client.get('/iu-mobile')
@@ -116,7 +161,9 @@ class TestFlaskRoutes:
             'description': 'This is a test project description for testing purposes.'
         }
         
-        response = client.post('/contact', data=data, follow_redirects=True)
+        # buffered: read the streamed page before the client re-pushes the
+        # POST's preserved request context on top of the stream's own
+        response = client.post('/contact', data=data, follow_redirects=True, buffered=True)
         assert response.status_code == 200
         assert b'All Projects' in response.data  # Should redirect to projects page
         assert b'Test Project' in response.data  # New project should be visible
@@ -156,7 +203,7 @@ class TestFlaskRoutes:
         try:
             with open(temp_image.name, 'rb') as img_file:
                 data['image'] = (img_file, 'test.jpg')
-                response = client.post('/contact', data=data, follow_redirects=True)
+                response = client.post('/contact', data=data, follow_redirects=True, buffered=True)
                 assert response.status_code == 200
                 assert b'All Projects' in response.data
                 assert b'Test Project with Image' in response.data
@@ -187,6 +234,540 @@ class TestFlaskRoutes:
         response = client.get('/static/css/hover.css')
         assert response.status_code == 200
     
+    def test_static_urls_fingerprinted(self, client):
+        """Test that templates link static assets by content-hashed name."""
+        import re
+        response = client.get('/')
+        assert re.search(rb'href="/static/css/styles\.[0-9a-f]{10}\.css"', response.data)
+        assert re.search(rb'href="/static/css/normalize\.[0-9a-f]{10}\.css"', response.data)
+        assert b'href="/static/css/styles.css"' not in response.data
+
+    def test_fingerprinted_asset_cached_immutably(self, client):
+        """Test that fingerprinted URLs serve the source file with a one-year immutable lifetime."""
+        import re
+        page = client.get('/').data
+        url = re.search(rb'href="(/static/css/styles\.[0-9a-f]{10}\.css)"', page).group(1).decode()
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.data == client.get('/static/css/styles.css').data
+        cache_control = response.headers['Cache-Control']
+        assert 'public' in cache_control
+        assert 'max-age=31536000' in cache_control
+        assert 'immutable' in cache_control
+
+        assert client.get('/static/css/styles.0000000000.css').status_code == 404
+
+    def test_static_etag_revalidation(self, client):
+        """Test that plain static URLs carry a strong ETag and answer 304 when unchanged."""
+        response = client.get('/static/css/hover.css')
+        etag = response.headers['ETag']
+        assert not etag.startswith('W/')
+        assert 'no-cache' in response.headers['Cache-Control']
+
+        response = client.get('/static/css/hover.css', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_asset_manifest_build(self, tmp_path):
+        """Test that the build step maps each static file to a content-hashed name."""
+        import json
+        import assets
+        (tmp_path / 'css').mkdir()
+        (tmp_path / 'css' / 'site.css').write_text('body { color: red; }')
+        (tmp_path / 'css' / '.DS_Store').write_bytes(b'junk')
+        (tmp_path / 'images' / 'uploads').mkdir(parents=True)
+        (tmp_path / 'images' / 'uploads' / 'abc.jpg').write_bytes(b'upload')
+
+        manifest = assets.write_manifest(tmp_path)
+
+        assert list(manifest) == ['css/site.css']
+        assert manifest['css/site.css'].startswith('css/site.') and manifest['css/site.css'].endswith('.css')
+        assert json.loads((tmp_path / 'manifest.json').read_text()) == manifest
+        (tmp_path / 'css' / 'site.css').write_text('body { color: blue; }')
+        assert assets.build_manifest(tmp_path)['css/site.css'] != manifest['css/site.css']
+
+    @pytest.fixture
+    def static_app(self, tmp_path):
+        """A bare app whose static folder holds one CSS file with precompressed siblings."""
+        import assets
+        (tmp_path / 'site.css').write_text('body { margin: 0; }\n' * 200)
+        (tmp_path / 'photo.jpg').write_bytes(b'\xff\xd8' + b'\x00' * 2000)
+        assets.compress_static(tmp_path)
+        static_app = Flask(__name__, static_folder=str(tmp_path), static_url_path='/static')
+        assets.init_app(static_app)
+        return static_app
+
+    def test_precompressed_static_negotiation(self, static_app, tmp_path):
+        """Test that precompressed variants are served per Accept-Encoding with Vary."""
+        import gzip
+        original = (tmp_path / 'site.css').read_bytes()
+        assert (tmp_path / 'site.css.gz').exists()
+        assert not (tmp_path / 'photo.jpg.gz').exists()
+
+        client = static_app.test_client()
+        plain = client.get('/static/site.css')
+        assert plain.data == original
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.headers['Vary'] == 'Accept-Encoding'
+
+        zipped = client.get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+        assert zipped.headers['Content-Encoding'] == 'gzip'
+        assert zipped.headers['Content-Type'].startswith('text/css')
+        assert zipped.headers['Vary'] == 'Accept-Encoding'
+        assert gzip.decompress(zipped.data) == original
+        assert zipped.headers['ETag'] != plain.headers['ETag']
+
+        image = client.get('/static/photo.jpg', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in image.headers
+
+    def test_stale_precompressed_variant_ignored(self, static_app, tmp_path):
+        """Test that a variant older than its source is not served."""
+        source = tmp_path / 'site.css'
+        source.write_text('body { margin: 1px; }\n' * 200)
+        stat = (tmp_path / 'site.css.gz').stat()
+        os.utime(source, (stat.st_atime + 10, stat.st_mtime + 10))
+
+        response = static_app.test_client().get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert response.data == source.read_bytes()
+
+    def test_html_compression_opt_in(self, client):
+        """Test on-the-fly gzip of rendered HTML when COMPRESS_HTML is enabled."""
+        import gzip
+        plain = client.get('/about', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in plain.headers
+
+        app.config['COMPRESS_HTML'] = True
+        try:
+            cache = app.extensions['compression']
+            first = client.get('/about', headers={'Accept-Encoding': 'gzip'})
+            misses = cache.misses
+            second = client.get('/about', headers={'Accept-Encoding': 'gzip'})
+            identity = client.get('/about')
+        finally:
+            app.config['COMPRESS_HTML'] = False
+
+        assert first.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(first.data) == plain.data
+        assert second.data == first.data
+        assert cache.misses == misses  # served from the LRU
+        assert 'Content-Encoding' not in identity.headers
+        assert identity.headers['Vary'] == 'Accept-Encoding'
+
+    def test_page_cache_serves_repeat_hits(self, client):
+        """Test that template-only pages are rendered once and then served from the cache."""
+        from flask import template_rendered
+        rendered = []
+        record = lambda sender, template, context, **extra: rendered.append(template.name)
+        cache = app.extensions['page_cache']
+        template_rendered.connect(record, app)
+        try:
+            first = client.get('/resume')
+            hits = cache.info()['hits']
+            second = client.get('/resume')
+        finally:
+            template_rendered.disconnect(record, app)
+
+        assert rendered == ['resume.html']
+        assert second.data == first.data
+        assert second.headers['ETag'] == first.headers['ETag']
+        assert 'Last-Modified' in second.headers
+        assert cache.info()['hits'] == hits + 1
+
+    def test_page_cache_conditional_get(self, client):
+        """Test that a matching If-None-Match gets a 304 without a body."""
+        etag = client.get('/about').headers['ETag']
+        response = client.get('/about', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_page_cache_conditional_get_compressed(self, client):
+        """Test that the ETag of a gzip-encoded page revalidates to a 304 with COMPRESS_HTML on."""
+        app.config['COMPRESS_HTML'] = True
+        try:
+            first = client.get('/about', headers={'Accept-Encoding': 'gzip'})
+            etag = first.headers['ETag']
+            response = client.get('/about', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        finally:
+            app.config['COMPRESS_HTML'] = False
+
+        assert first.headers['Content-Encoding'] == 'gzip'
+        assert etag.endswith('-gzip"')
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+    def test_page_cache_keyed_on_data_version(self, client):
+        """Test that a change to a project row re-renders its page."""
+        import DAL
+        before = client.get('/iu-mobile')
+        with DAL.get_connection() as conn:
+            conn.execute("UPDATE projects SET title = 'IU Mobile Renamed' WHERE slug = 'iu-mobile'")
+        after = client.get('/iu-mobile')
+        assert after.headers['ETag'] != before.headers['ETag']
+        assert b'IU Mobile Renamed' in after.data
+
+    def test_page_cache_opt_out(self, client):
+        """Test that views marked @no_page_cache are never stored."""
+        cache = app.extensions['page_cache']
+        stores = cache.info()['stores']
+        client.get('/contact')
+        client.get('/contact')
+        client.get('/projects')
+        assert cache.info()['stores'] == stores
+
+    def test_page_cache_lru_eviction(self):
+        """Test that the cache evicts least-recently-used pages past its byte budget."""
+        from page_cache import PageCache
+        cache = PageCache(max_bytes=25)
+        cache.put('a', b'x' * 10, 'text/html')
+        cache.put('b', b'y' * 10, 'text/html')
+        cache.get('a')
+        cache.put('c', b'z' * 10, 'text/html')
+
+        assert cache.get('b') is None
+        assert cache.get('a')['body'] == b'x' * 10
+        assert cache.info()['evictions'] == 1
+        assert cache.info()['bytes'] == 20
+
+    def test_freeze_writes_site(self, client, tmp_path):
+        """Test that freezing renders every page and copies plain and fingerprinted assets."""
+        import freeze
+        stats = freeze.freeze(app, tmp_path)
+
+        assert stats['errors'] == []
+        assert (tmp_path / 'index.html').read_bytes().startswith(b'<!DOCTYPE html>')
+        assert b'Nice to meet you!' in (tmp_path / 'about' / 'index.html').read_bytes()
+        assert b'IU Mobile User Feedback' in (tmp_path / 'projects' / 'index.html').read_bytes()
+        assert (tmp_path / 'iu-mobile' / 'index.html').exists()
+        assert (tmp_path / 'static' / 'css' / 'styles.css').exists()
+        fingerprinted = app.extensions['assets'].fingerprinted['css/styles.css']
+        assert (tmp_path / 'static' / fingerprinted).exists()
+        assert fingerprinted.encode() in (tmp_path / 'index.html').read_bytes()
+
+    def test_freeze_incremental_after_insert(self, client, tmp_path):
+        """Test that an incremental freeze only re-renders pages whose inputs changed."""
+        import freeze
+        from DAL import insert_project
+        first = freeze.freeze(app, tmp_path)
+        assert first['skipped'] == 0
+
+        second = freeze.freeze(app, tmp_path)
+        assert second['rendered'] == 0
+        assert second['skipped'] == first['rendered']
+        assert second['copied'] == 0
+
+        insert_project('Frozen Project', 'Added after the first build', 'bam-preview.jpg')
+        third = freeze.freeze(app, tmp_path)
+        assert third['rendered'] == 2  # the listing and the new row's own page
+        assert b'Frozen Project' in (tmp_path / 'projects' / 'index.html').read_bytes()
+        assert b'Added after the first build' in (tmp_path / 'projects' / 'frozen-project' / 'index.html').read_bytes()
+
+        (tmp_path / 'about' / 'index.html').unlink()
+        assert freeze.freeze(app, tmp_path)['rendered'] == 1
+
+    def test_freeze_lists_every_project_unpaged(self, client, tmp_path):
+        """Test that the frozen listing holds all projects rather than the first keyset page."""
+        import freeze
+        app.config['PROJECTS_PAGE_SIZE'] = 2
+        try:
+            freeze.freeze(app, tmp_path)
+            assert b'?after=' in client.get('/projects').data
+        finally:
+            app.config['PROJECTS_PAGE_SIZE'] = DAL_PAGE_SIZE
+
+        listing = (tmp_path / 'projects' / 'index.html').read_text()
+        assert 'Collecting feedback' in listing
+        assert 'Migrating nearly 400' in listing
+        assert '?after=' not in listing
+
+    def test_freeze_tracks_tags(self, client, tmp_path):
+        """Test that tag changes re-render the frozen listing, which has no ?tag= links."""
+        import freeze
+        import DAL
+        freeze.freeze(app, tmp_path)
+        listing = (tmp_path / 'projects' / 'index.html').read_text()
+        assert 'ux research' in listing
+        assert '?tag=' not in listing
+
+        DAL.add_project_tags(DAL.get_project('iu-mobile').id, ['frozen tag'])
+        stats = freeze.freeze(app, tmp_path)
+        assert stats['rendered'] >= 1
+        assert 'frozen tag' in (tmp_path / 'projects' / 'index.html').read_text()
+        assert '?tag=' in client.get('/projects').get_data(as_text=True)
+
+    def test_metrics_endpoint(self, client):
+        """Test that /metrics reports request latency and per-endpoint SQL counts."""
+        client.get('/')
+        client.get('/projects').get_data()
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        text = response.get_data(as_text=True)
+        assert '# TYPE http_request_duration_seconds histogram' in text
+        assert 'http_request_duration_seconds_bucket{endpoint="index",method="GET",le="+Inf"}' in text
+        assert 'http_requests_total{endpoint="index",method="GET",status="200"}' in text
+        assert 'http_request_sql_statements_total{endpoint="projects"}' in text
+        assert 'sql_statement_duration_seconds_count{operation="SELECT"}' in text
+        assert 'jobs_queue{name="depth"}' in text
+        assert 'db_pool{name="in_use"}' in text
+
+    def test_metrics_sql_recorded_per_app(self, client):
+        """Test that building another app doesn't take SQL metrics away from this one."""
+        from app import create_app
+        other = create_app({'TESTING': True})
+        client.get('/projects').get_data()
+        text = client.get('/metrics').get_data(as_text=True)
+        assert 'http_request_sql_statements_total{endpoint="projects"}' in text
+        assert 'sql_statement_duration_seconds_count{operation="SELECT"}' in text
+        assert other.extensions['metrics'].sql_duration.snapshot() == {}
+
+    def test_metrics_count_unmatched_requests(self, client):
+        """Test that 404s are recorded without inventing an endpoint per URL."""
+        client.get('/no-such-page')
+        text = client.get('/metrics').get_data(as_text=True)
+        assert 'http_requests_total{endpoint="unmatched",method="GET",status="404"}' in text
+
+    @pytest.fixture
+    def profiling(self, tmp_path, monkeypatch):
+        """Enable the profiler with a token, writing captures to a temp dir."""
+        for key, value in {
+            'PROFILER_ENABLED': True,
+            'PROFILER_TOKEN': 'secret',
+            'PROFILER_DIR': str(tmp_path),
+            'PROFILER_SAMPLE_RATE': 0.0,
+            'PROFILER_SLOW_MS': None,
+        }.items():
+            monkeypatch.setitem(app.config, key, value)
+        return tmp_path
+
+    def test_profiler_header_capture(self, client, profiling):
+        """Test that a request with the trusted header writes a .prof and is listed."""
+        client.get('/about')
+        assert list(profiling.iterdir()) == []
+
+        client.get('/about', headers={'X-Profile': 'wrong'})
+        assert list(profiling.iterdir()) == []
+
+        assert client.get('/about', headers={'X-Profile': 'secret'}).status_code == 200
+        assert len(list(profiling.glob('*.prof'))) == 1
+        captures = app.extensions['profiler'].store.captures()
+        assert captures[0]['endpoint'] == 'about'
+        assert captures[0]['reason'] == 'header'
+
+        index = client.get('/_profiler?token=secret')
+        assert index.status_code == 200
+        assert b'about' in index.data
+        name = next(n for n in captures[0]['files'] if n.endswith('.prof'))
+        download = client.get(f'/_profiler/{name}?token=secret')
+        assert download.status_code == 200
+
+    def test_profiler_index_requires_token(self, client, profiling):
+        """Test that the capture index is refused without the token."""
+        assert client.get('/_profiler').status_code == 403
+        app.config['PROFILER_ENABLED'] = False
+        assert client.get('/_profiler?token=secret').status_code == 404
+
+    def test_profiler_slow_threshold(self, client, profiling):
+        """Test that requests over the slow threshold are captured as collapsed stacks only."""
+        app.config['PROFILER_SLOW_MS'] = 0
+        client.get('/projects').get_data()
+        captures = app.extensions['profiler'].store.captures()
+        assert [c['reason'] for c in captures] == ['slow']
+        assert not any(name.endswith('.prof') for name in captures[0]['files'])
+
+    def test_profiler_rotation(self, client, profiling):
+        """Test that only the newest PROFILER_KEEP captures are kept."""
+        app.config['PROFILER_KEEP'] = 2
+        try:
+            for _ in range(4):
+                client.get('/about', headers={'X-Profile': 'secret'})
+        finally:
+            app.config['PROFILER_KEEP'] = 200
+        assert len(list(profiling.glob('*.json'))) == 2
+        assert len(list(profiling.glob('*.prof'))) == 2
+
+    def test_create_app_migrates_lazily(self, tmp_path):
+        """Test that a factory-built app creates and seeds a fresh database on its first request."""
+        import DAL
+        from app import create_app
+        original_db_path = DAL.DB_PATH
+        DAL.DB_PATH = tmp_path / 'fresh.db'
+        try:
+            fresh = create_app({'TESTING': True, 'PROJECTS_PAGE_SIZE': 2})
+            assert fresh is not app
+            assert fresh.config['PROJECTS_PAGE_SIZE'] == 2
+            assert not DAL.DB_PATH.exists()  # building the app doesn't touch the database
+
+            response = fresh.test_client().get('/projects')
+            assert response.status_code == 200
+            assert b'IU Mobile User Feedback' in response.data
+            assert b'Migrating nearly 400 career resources' not in response.data
+        finally:
+            DAL.close_all_connections()
+            DAL.DB_PATH = original_db_path
+
+    def test_template_bytecode_cache_and_preload(self, tmp_path, monkeypatch):
+        """Test that preloading fills the bytecode cache and a second app compiles nothing."""
+        import jinja2
+        from app import create_app
+        config = {'TESTING': True, 'TEMPLATE_CACHE_DIR': str(tmp_path), 'TEMPLATE_PRELOAD': True}
+        first = create_app(config)
+        templates = first.jinja_env.list_templates()
+        assert len(list(tmp_path.glob('*.cache'))) == len(templates)
+
+        compiled = []
+        original_compile = jinja2.Environment.compile
+        monkeypatch.setattr(jinja2.Environment, 'compile',
+                            lambda env, *args, **kwargs: compiled.append(args) or original_compile(env, *args, **kwargs))
+        second = create_app(config)
+        assert compiled == []
+        assert len(second.jinja_env.cache) == len(templates)
+
+    def test_project_detail_route(self, client):
+        """Test that /projects/<slug> serves bespoke templates, a generic page, and 404s."""
+        bespoke = client.get('/projects/iu-mobile')
+        assert bespoke.status_code == 200
+        assert b'User Research and Data Analysis' in bespoke.data  # iu_mobile.html
+
+        insert_project('Submitted Project', 'Sent through the form', 'Image-Coming-Soon.png')
+        generic = client.get('/projects/submitted-project')
+        assert generic.status_code == 200
+        assert b'Submitted Project' in generic.data
+        assert b'Sent through the form' in generic.data
+
+        assert client.get('/projects/no-such-project').status_code == 404
+
+    def test_projects_listing_links(self, client):
+        """Test that listing rows link to bespoke pages or /projects/<slug>, never '#'."""
+        insert_project('Submitted Project', 'Sent through the form', 'Image-Coming-Soon.png')
+        html = client.get('/projects').get_data(as_text=True)
+        assert 'href="/iu-mobile"' in html
+        assert 'href="/resource-library"' in html
+        assert 'href="/projects/submitted-project"' in html
+        assert "window.location='#'" not in html
+
+    def test_api_projects_stream(self, client):
+        """Test the JSON and NDJSON listings, keyset paging and field selection."""
+        import json
+        from DAL import bulk_insert_projects
+        bulk_insert_projects({'title': f'Api {i}', 'description': 'd'} for i in range(150))
+
+        listing = client.get('/api/projects')
+        assert listing.status_code == 200
+        assert listing.is_streamed
+        body = json.loads(listing.data)
+        assert len(body['projects']) == 153
+        assert body['next_after'] is None
+        assert body['projects'][0]['slug'] == 'iu-mobile'
+        assert set(body['projects'][0]) == {
+            'id', 'slug', 'title', 'description', 'image_file_name', 'image_width', 'image_height', 'image_color',
+        }
+
+        first = client.get('/api/projects?limit=2&fields=slug,id').get_json()
+        assert first == {'projects': [{'id': 1, 'slug': 'iu-mobile'}, {'id': 2, 'slug': 'building-a-mind'}], 'next_after': 2}
+        second = client.get(f"/api/projects?after={first['next_after']}&limit=2&fields=slug").get_json()
+        assert second['projects'] == [{'slug': 'resource-library'}, {'slug': 'api-0'}]
+
+        ndjson = client.get('/api/projects?after=150', headers={'Accept': 'application/x-ndjson'})
+        assert ndjson.mimetype == 'application/x-ndjson'
+        assert [json.loads(line)['slug'] for line in ndjson.get_data(as_text=True).splitlines()] == [
+            'api-147', 'api-148', 'api-149'
+        ]
+
+        assert client.get('/api/projects?fields=slug,secret').status_code == 400
+        assert client.get('/api/projects?limit=0').status_code == 400
+
+    def test_api_etags_follow_data_version(self, client):
+        """Test 304s while nothing changes and a new ETag after a write."""
+        first = client.get('/api/projects?limit=10')
+        etag = first.headers['ETag']
+        assert not etag.startswith('W/')
+        assert client.get('/api/projects?limit=10', headers={'If-None-Match': etag}).status_code == 304
+        assert client.get('/api/projects?limit=5', headers={'If-None-Match': etag}).status_code == 200
+
+        single = client.get('/api/projects/iu-mobile')
+        assert single.get_json()['title'] == 'IU Mobile User Feedback'
+        assert client.get('/api/projects/iu-mobile', headers={'If-None-Match': single.headers['ETag']}).status_code == 304
+        assert client.get('/api/projects/no-such-project').status_code == 404
+
+        insert_project('Fresh Project', 'd', 'x.jpg')
+        changed = client.get('/api/projects?limit=10', headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+
+    def test_projects_tag_filter_and_facets(self, client):
+        """Test ?tag= filtering (all/any), facet counts, and tags submitted through the form."""
+        response = client.post('/contact', data={
+            'title': 'Tagged Submission',
+            'description': 'Submitted with tags.',
+            'tags': 'Mobile, Accessibility',
+        }, follow_redirects=True, buffered=True)
+        assert b'Tagged Submission' in response.data
+
+        # Titles also appear in the nav, so rows are identified by description
+        html = client.get('/projects?tag=mobile').get_data(as_text=True)
+        assert 'Collecting feedback and discovering insights' in html
+        assert 'Tagged Submission' in html
+        assert 'Migrating nearly 400 career resources' not in html
+        assert 'href="/projects?tag=mobile&amp;tag=accessibility"' in html  # facet drill-down
+
+        html = client.get('/projects?tag=mobile&tag=accessibility').get_data(as_text=True)
+        assert 'Tagged Submission' in html
+        assert 'Collecting feedback and discovering insights' not in html
+
+        html = client.get('/projects?tag=ai&tag=accessibility&match=any').get_data(as_text=True)
+        assert 'Designing a user interface' in html
+        assert 'Tagged Submission' in html
+
+        listing = client.get('/projects').get_data(as_text=True)
+        assert 'mobile <span class="text-secondary">2</span>' in listing
+        assert 'No projects have all of these tags.' in client.get('/projects?tag=unknown').get_data(as_text=True)
+
+    def test_static_range_requests(self, client):
+        """Test 206 partial responses, If-Range, and the whole file for multi-range requests."""
+        url = '/static/Clark_Camilla_Resume.pdf'
+        full = client.get(url)
+        etag = full.headers['ETag']
+
+        partial = client.get(url, headers={'Range': 'bytes=100-199'})
+        assert partial.status_code == 206
+        assert partial.data == full.data[100:200]
+        assert partial.headers['Content-Range'] == f'bytes 100-199/{len(full.data)}'
+        assert partial.headers['Accept-Ranges'] == 'bytes'
+
+        assert client.get(url, headers={'Range': 'bytes=-10', 'If-Range': etag}).data == full.data[-10:]
+        stale = client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"outdated"'})
+        assert stale.status_code == 200 and stale.data == full.data
+
+        multi = client.get(url, headers={'Range': 'bytes=0-9,20-29'})
+        assert multi.status_code == 200 and multi.data == full.data
+        assert client.get(url, headers={'Range': f'bytes={len(full.data) + 10}-'}).status_code == 416
+
+    def test_static_offload_headers(self, client, monkeypatch):
+        """Test that offload modes return headers only and leave 304s to the app."""
+        url = '/static/Clark_Camilla_Resume.pdf'
+        monkeypatch.setitem(app.config, 'STATIC_OFFLOAD', 'x-accel-redirect')
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.data == b''
+        assert response.headers['X-Accel-Redirect'] == '/_protected_static/Clark_Camilla_Resume.pdf'
+        assert response.headers['Content-Type'] == 'application/pdf'
+
+        revalidated = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+        assert revalidated.status_code == 304
+        assert 'X-Accel-Redirect' not in revalidated.headers
+
+        monkeypatch.setitem(app.config, 'STATIC_OFFLOAD', 'x-sendfile')
+        response = client.get(url)
+        assert response.headers['X-Sendfile'] == os.path.join(app.static_folder, 'Clark_Camilla_Resume.pdf')
+
+    def test_static_path_traversal_rejected(self, client):
+        """Test that the static route does not serve files outside static/."""
+        assert client.get('/static/../app.py').status_code == 404
+        assert client.get('/static/%2e%2e/app.py').status_code == 404
+
     def test_project_images_served(self, client):
         """Test that project images are properly served."""
         response = client.get('/static/images/iu-mobile-sentiments.jpg')